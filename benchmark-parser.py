@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark Parser
+Measures how fast we can parse NMEA0183, using a synthetic B&G style data stream so the runs are repeatable.
+Reports sentences per second and memory per sentence for each sentence type, plus whole file ingestion
+the same way generate-polars.py does it, and writes the results as JSON so runs can be compared over time.
+"""
+
+__author__ = "Zach Hoeken"
+__copyright__ = "Copyright 2022, Zach Hoeken"
+__credits__ = ["Zach Hoeken"]
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Zach Hoeken"
+__email__ = "hoeken@gmail.com"
+__status__ = "Beta"
+
+import argparse
+import os
+import json
+import math
+import time
+import datetime
+import platform
+import random
+import tempfile
+import tracemalloc
+import functools
+import operator
+import nmea0183
+import polarlog
+
+import numpy as np
+import pandas as pd
+
+#a fixed start time so our generated logs are byte for byte identical between runs
+START_TIME = 1641600000.0
+
+#wrap a sentence body with $ and its checksum
+def checksum_line(body):
+	checksum = functools.reduce(operator.xor, body.encode('ascii'), 0)
+	return "${}*{:02X}".format(body, checksum)
+
+#generate a deterministic B&G style stream, returns a list of (unix_time, line)
+#the boat wanders around the wind so we get a good spread of TWA/TWS, and some lines get mangled on purpose.
+def generate_stream(seconds=3600, seed=1, bad_checksums=0.01, truncated=0.005):
+	rnd = random.Random(seed)
+	stream = []
+
+	twa = 45.0
+	tws = 10.0
+	heading = 90.0
+
+	for second in range(seconds):
+		#slowly wander around
+		twa = min(178.0, max(28.0, twa + rnd.gauss(0, 0.8) + 0.03 * math.sin(second / 900.0)))
+		tws = min(30.0, max(2.0, tws + rnd.gauss(0, 0.08)))
+		heading = (heading + rnd.gauss(0, 0.5)) % 360
+		bsp = max(0.1, 0.55 * tws * math.sin(math.radians(twa)) ** 0.4)
+		sog = bsp * 1.04
+		stamp = datetime.datetime.utcfromtimestamp(START_TIME + second)
+
+		sentences = []
+
+		#wind and boat speed come in a couple of times a second
+		for i in range(2):
+			t = START_TIME + second + i * 0.5
+			angle = (twa + rnd.gauss(0, 3)) % 360
+			if rnd.random() < 0.5:
+				angle = 360 - angle
+			awa = max(5.0, twa * 0.7)
+			sentences.append((t, 'IIMWV,{:.1f},T,{:.1f},N,A'.format(angle, tws + rnd.gauss(0, 0.6))))
+			sentences.append((t, 'IIMWV,{:.1f},R,{:.1f},N,A'.format(awa, tws + bsp * 0.6)))
+			sentences.append((t, 'IIVHW,,T,{:.1f},M,{:.2f},N,{:.2f},K'.format(heading, bsp + rnd.gauss(0, 0.1), bsp * 1.852)))
+			sentences.append((t, 'IIXDR,A,{:.1f},D,PTCH,A,{:.1f},D,ROLL'.format(rnd.gauss(0, 2), rnd.gauss(10, 5))))
+
+		t = START_TIME + second
+		for i in range(5):
+			sentences.append((t + i * 0.2, 'IIHDG,{:.1f},,,14.5,W'.format(heading)))
+
+		#once a second we get position and the satellite chatter
+		sentences.append((t, 'GPRMC,{},A,1820.{:04d},N,06456.{:04d},W,{:.1f},{:.1f},{},14.5,W,A'.format(stamp.strftime('%H%M%S'), second % 10000, second % 10000, sog, heading, stamp.strftime('%d%m%y'))))
+		sentences.append((t, 'GPVTG,{:.1f},T,{:.1f},M,{:.1f},N,{:.1f},K,A'.format(heading, heading + 14.5, sog, sog * 1.852)))
+		sentences.append((t, 'GPGLL,1820.{:04d},N,06456.{:04d},W,{},A,A'.format(second % 10000, second % 10000, stamp.strftime('%H%M%S'))))
+		for i in range(3):
+			sats = []
+			for j in range(4):
+				sats.append('{:02d},{:02d},{:03d},{:02d}'.format(i*4 + j + 1, rnd.randint(5, 85), rnd.randint(0, 359), rnd.randint(20, 50)))
+			sentences.append((t, 'GPGSV,3,{},12,{}'.format(i + 1, ','.join(sats))))
+		sentences.append((t, 'GPGSA,A,3,01,02,03,05,07,08,11,,,,,,1.6,0.9,1.3'))
+		sentences.append((t, 'SDDPT,{:.1f},0.5'.format(10 + 5 * math.sin(second / 300.0))))
+
+		#and every so often...
+		if second % 2 == 0:
+			sentences.append((t, 'IIMTW,26.{},C'.format(second % 10)))
+		if second % 5 == 0:
+			sentences.append((t, 'IIVLW,1234.5,N,{:.2f},N'.format(second * bsp / 3600.0)))
+
+		for t, body in sentences:
+			line = checksum_line(body)
+
+			#real life is messy
+			roll = rnd.random()
+			if roll < bad_checksums:
+				line = line[0:-2] + '{:02X}'.format((int(line[-2:], 16) + 1) % 256)
+			elif roll < bad_checksums + truncated:
+				line = line[0:rnd.randint(1, len(line) - 1)]
+
+			stream.append((t, line))
+
+	return stream
+
+#write a stream out as a log file, exactly like log-nmea0183-over-ip.py does
+def write_log(filename, stream):
+	with open(filename, 'w') as f:
+		for unix_time, line in stream:
+			jdata = {}
+			jdata['time'] = datetime.datetime.utcfromtimestamp(unix_time).isoformat()
+			jdata['unix_time'] = unix_time
+			jdata['timezone'] = 'America/Puerto_Rico'
+			jdata['lines'] = [line]
+			f.write(json.dumps(jdata) + "\n")
+
+#best wall time out of repeat runs of func()
+def best_time(func, repeat):
+	best = None
+	for i in range(repeat):
+		start = time.perf_counter()
+		func()
+		elapsed = time.perf_counter() - start
+		if best is None or elapsed < best:
+			best = elapsed
+
+	return best
+
+#memory used by func(), keeping its result alive.  returns (blocks still allocated, peak bytes).
+#temporaries that func() frees before it returns don't show up in the blocks, only in the peak.
+def memory_used(func):
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	result = func()
+	after = tracemalloc.take_snapshot()
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+	del result
+
+	return blocks, peak
+
+#run one parser benchmark over a list of lines
+def bench(func, lines, repeat, allocations=True):
+	count = len(lines)
+	elapsed = best_time(func, repeat)
+
+	results = {}
+	results['sentences'] = count
+	results['seconds'] = round(elapsed, 6)
+	results['sentences_per_second'] = round(count / elapsed) if elapsed else None
+
+	if allocations:
+		blocks, peak = memory_used(func)
+		results['retained_blocks_per_sentence'] = round(blocks / count, 3)
+		results['peak_bytes_per_sentence'] = round(peak / count, 1)
+
+	return results
+
+def main():
+	#these are our command line arguments
+	parser = argparse.ArgumentParser(description='Benchmark the NMEA0183 parser against a synthetic data stream.')
+	parser.add_argument('-s', '--seconds', action='store', default=3600, type=int, help='How many seconds of sailing to generate.  Default is 1 hour.')
+	parser.add_argument('--seed', action='store', default=1, type=int, help='Random seed for the generator.')
+	parser.add_argument('-r', '--repeat', action='store', default=3, type=int, help='How many times to run each benchmark, we keep the best.')
+	parser.add_argument('-o', '--output', action='store', help='JSON file to write results to.  Default is benchmarks/benchmark-<date>.json')
+	parser.add_argument('--generate', action='store', help='Just write a synthetic log file with this name and exit.')
+	parser.add_argument('--no-alloc', dest='alloc', default=True, action='store_false', help="Skip the memory measurements, they are slow.")
+
+	args = parser.parse_args()
+
+	print("Generating {} seconds of data...".format(args.seconds))
+	stream = generate_stream(args.seconds, args.seed)
+	lines = [line for unix_time, line in stream]
+
+	#do they just want a log file?
+	if args.generate:
+		write_log(args.generate, stream)
+		print("Wrote {} lines to {}".format(len(stream), args.generate))
+		return
+
+	results = {}
+	results['time'] = datetime.datetime.now().isoformat()
+	results['python'] = platform.python_version()
+	results['machine'] = platform.machine()
+	results['numpy'] = np.__version__
+	results['pandas'] = pd.__version__
+	results['nmea0183'] = nmea0183.__version__
+	results['seconds'] = args.seconds
+	results['seed'] = args.seed
+	results['repeat'] = args.repeat
+	results['memory'] = "retained_blocks_per_sentence is memory blocks still held by the results once a run returns, not every allocation made along the way. peak_bytes_per_sentence is the most memory in use during the run, results included."
+
+	#
+	# each sentence type on its own
+	#
+
+	by_type = {}
+	for line in lines:
+		by_type.setdefault(line[3:6] if len(line) >= 6 else 'short', []).append(line)
+
+	results['sentences'] = {}
+	for sentence in sorted(by_type):
+		mylines = by_type[sentence]
+		nmea = nmea0183.nmea0183()
+		results['sentences'][sentence] = bench(lambda: [nmea.parseline(line) for line in mylines], mylines, args.repeat, args.alloc)
+		print("{:>6} {:>10} sentences/s".format(sentence, results['sentences'][sentence]['sentences_per_second']))
+
+	#
+	# the whole mixed stream, different ways
+	#
+
+	wanted = {'MWV', 'VHW', 'RMC'}
+	raw_lines = [(line + "\r\n").encode('ascii') for line in lines]
+
+	results['stream'] = {}
+	nmea = nmea0183.nmea0183()
+	results['stream']['parseline'] = bench(lambda: [nmea.parseline(line) for line in lines], lines, args.repeat, args.alloc)
+	wanted_nmea = nmea0183.nmea0183(wanted=wanted)
+	results['stream']['parseline_wanted'] = bench(lambda: [wanted_nmea.parseline(line) for line in lines], lines, args.repeat, args.alloc)
+	results['stream']['parsebytes'] = bench(lambda: [nmea.parsebytes(line) for line in raw_lines], lines, args.repeat, args.alloc)
+	results['stream']['verifyline'] = bench(lambda: [nmea.verifyline(line) for line in lines], lines, args.repeat, args.alloc)
+	results['stream']['verifylines'] = bench(lambda: nmea.verifylines(lines), lines, args.repeat, args.alloc)
+	results['stream']['decode_columns'] = bench(lambda: nmea0183.decode_columns(lines, ('twa', 'tws', 'water_speed', 'sog')), lines, args.repeat, args.alloc)
+
+	for name, result in results['stream'].items():
+		print("{:>16} {:>10} sentences/s".format(name, result['sentences_per_second']))
+
+	#
+	# whole file ingestion, same as generate-polars.py
+	#
+
+	with tempfile.TemporaryDirectory() as tmpdir:
+		logfile = os.path.join(tmpdir, 'benchmark-log.txt')
+		write_log(logfile, stream)
+		size = os.path.getsize(logfile)
+
+		ingestion = bench(lambda: polarlog.read_log(logfile), lines, args.repeat, args.alloc)
+		ingestion['bytes'] = size
+		ingestion['megabytes_per_second'] = round(size / ingestion['seconds'] / 1e6, 2)
+
+		channels = polarlog.read_log(logfile)
+		ingestion['samples'] = {name: len(series) for name, series in channels.items()}
+
+	results['ingestion'] = ingestion
+	print("{:>16} {:>10} sentences/s {} MB/s".format('read_log', ingestion['sentences_per_second'], ingestion['megabytes_per_second']))
+
+	#
+	# write it out
+	#
+
+	output = args.output
+	if not output:
+		d = datetime.datetime.today()
+		output = "benchmarks/benchmark-{}.json".format(d.strftime("%Y-%m-%d %H%M"))
+
+	mydir = os.path.dirname(output)
+	if mydir and not os.path.exists(mydir):
+		os.makedirs(mydir)
+
+	with open(output, 'w') as f:
+		json.dump(results, f, indent=2)
+
+	print("Writing results to {}".format(output))
+
+if __name__ == '__main__':
+	main()
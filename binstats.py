@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Bin Stats
+Running statistics for every tws/twa bin of a polar, in a fixed amount of memory no matter how much data goes through them.
+Each bin keeps its count, mean and variance (Welford style) plus a fine fixed-width histogram of boat speeds,
+which gives us the median, the +/- 1 sigma filtered mean and the histogram plots.  Two of them can be merged.
+"""
+
+__author__ = "Zach Hoeken"
+__copyright__ = "Copyright 2022, Zach Hoeken"
+__credits__ = ["Zach Hoeken"]
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Zach Hoeken"
+__email__ = "hoeken@gmail.com"
+__status__ = "Beta"
+
+import numpy as np
+
+#histogram resolution in knots, and the top of it.  faster boat speeds get counted in the top bucket.
+HISTOGRAM_STEP = 0.01
+HISTOGRAM_MAX = 30
+
+class BinStats:
+
+	def __init__(self, cells, step=HISTOGRAM_STEP, top=HISTOGRAM_MAX):
+		self.cells = cells
+		self.step = step
+		self.buckets = int(round(top / step))
+
+		self.count = np.zeros(cells, dtype='int64')
+		self.mean = np.zeros(cells, dtype='float64')
+		self.m2 = np.zeros(cells, dtype='float64')
+		self.histogram = np.zeros((cells, self.buckets), dtype='int64')
+
+	#add a batch of boat speeds, with the cell each one goes in
+	def add(self, cells, values):
+		cells = np.asarray(cells, dtype='int64')
+		values = np.asarray(values, dtype='float64')
+
+		#NaN would poison the running mean
+		good = np.isfinite(values)
+		cells = cells[good]
+		values = values[good]
+
+		#stats for just this batch...
+		count = np.bincount(cells, minlength=self.cells)
+		mean = np.bincount(cells, weights=values, minlength=self.cells) / np.maximum(count, 1)
+		m2 = np.bincount(cells, weights=(values - mean[cells]) ** 2, minlength=self.cells)
+
+		#...then fold them in
+		self.combine(count, mean, m2)
+		np.add.at(self.histogram, (cells, self.bucket(values)), 1)
+
+	#fold another BinStats into this one
+	def merge(self, other):
+		if other.cells != self.cells or other.buckets != self.buckets or other.step != self.step:
+			raise ValueError("Can't merge BinStats with different bins")
+
+		self.combine(other.count, other.mean, other.m2)
+		self.histogram += other.histogram
+
+	#merge in the count/mean/variance of some more data, Chan et al's parallel version of Welford's algorithm
+	def combine(self, count, mean, m2):
+		total = self.count + count
+		share = count / np.maximum(total, 1)
+		delta = mean - self.mean
+
+		self.mean = self.mean + delta * share
+		self.m2 = self.m2 + m2 + delta ** 2 * self.count * share
+		self.count = total
+
+	#which histogram bucket each value goes in
+	def bucket(self, values):
+		return np.clip(np.floor(values / self.step), 0, self.buckets - 1).astype('int64')
+
+	#population standard deviation of each cell, same as numpy.std()
+	def stddev(self):
+		return np.sqrt(self.m2 / np.maximum(self.count, 1))
+
+	#approximate median of one cell, interpolated inside the histogram bucket it lands in
+	def median(self, cell):
+		counts = self.histogram[cell]
+		if not self.count[cell]:
+			return float('nan')
+
+		#numpy.median() averages the two middle values when there's an even number
+		cumulative = np.cumsum(counts)
+		middle = [(self.count[cell] - 1) // 2, self.count[cell] // 2]
+
+		return sum(self.value_at(counts, cumulative, rank) for rank in middle) / 2
+
+	#approximate value of the rank'th smallest boat speed, spreading each bucket's speeds evenly across it
+	def value_at(self, counts, cumulative, rank):
+		bucket = int(np.searchsorted(cumulative, rank, side='right'))
+		before = cumulative[bucket] - counts[bucket]
+
+		return (bucket + (rank - before + 0.5) / counts[bucket]) * self.step
+
+	#approximate mean of the boat speeds in one cell between low and high, from the histogram.
+	#the buckets low and high fall in only count for the part of them that is inside, as if their speeds were spread evenly.
+	def filtered_mean(self, cell, low, high):
+		edges = np.arange(self.buckets + 1) * self.step
+		inside_low = np.maximum(edges[0:-1], low)
+		inside_high = np.minimum(edges[1:], high)
+		share = np.clip((inside_high - inside_low) / self.step, 0, 1)
+
+		counts = self.histogram[cell] * share
+		if not counts.sum():
+			return float('nan')
+
+		return float((counts * (inside_low + inside_high) / 2).sum() / counts.sum())
+
+	#bucket centers and counts of one cell, trimmed down to the buckets that have something in them.  for plotting.
+	def cell_histogram(self, cell):
+		counts = self.histogram[cell]
+		used = np.flatnonzero(counts)
+		if not len(used):
+			return np.empty(0), np.empty(0)
+
+		counts = counts[used[0]:used[-1] + 1]
+		centers = (np.arange(used[0], used[-1] + 1) + 0.5) * self.step
+
+		return centers, counts
@@ -21,10 +21,38 @@ import csv
 import math
 from pprint import pprint
 import os
+import array
+import binstats
 
 import numpy as np
 import matplotlib.pyplot as plt
 
+#index of the nearest bin in a sorted list for each value, ties go to the lower bin.
+#anything 1000 or more away from every bin (or NaN) goes in whichever bin is 0, just like bin_speeds()
+def nearest_bins(values, bins):
+	values = np.asarray(values, dtype='float64')
+	bins = np.asarray(bins, dtype='float64')
+
+	#the bins on either side of each value
+	upper = np.clip(np.searchsorted(bins, values), 1, len(bins) - 1)
+	lower = np.maximum(upper - 1, 0)
+	lower_delta = np.abs(bins[lower] - values)
+	upper_delta = np.abs(bins[upper] - values)
+
+	#only move up if it's actually closer
+	nearest = np.where(upper_delta < lower_delta, upper, lower)
+	delta = np.minimum(lower_delta, upper_delta)
+
+	default = np.flatnonzero(bins == 0)
+	nearest[~(delta < 1000)] = default[0] if len(default) else 0
+
+	return nearest
+
+#sum up the data between each pair of starts.  each one is a plain numpy sum of a contiguous slice,
+#so the numbers get added up in exactly the same order (and round the same way) as numpy.mean() and numpy.std() on that bin.
+def sum_cells(data, starts):
+	return np.array([np.add.reduce(data[start:end]) for start, end in zip(starts[0:-1].tolist(), starts[1:].tolist())], dtype='float64')
+
 class BoatPolar:
 
 	#hoeken's standard...
@@ -46,13 +74,19 @@ class BoatPolar:
 	#wind_angles = [40, 45, 52, 60, 70, 80, 90, 100, 110, 120, 135, 150, 160, 170, 180]
 	#wind_speeds = [4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 20, 25]
 
-	def __init__(self):
-		self.bins = {}
-		for speed in self.wind_speeds:
-			angle_bin = {}
-			for angle in self.wind_angles:
-				angle_bin[angle] = []
-			self.bins[speed] = angle_bin
+	#with streaming=True we only keep running statistics for each bin instead of every boat speed,
+	#so memory doesn't grow with the amount of data, but the median and filtered mean are approximate.
+	def __init__(self, streaming=False):
+		#every boat speed we've binned and which tws/twa cell it went in, as compact arrays that grow as we go.
+		#get_bins() sorts them out into cells when we need them.
+		self.bin_data = array.array('d')
+		self.bin_cells = array.array('H')
+
+		self.histograms = []
+
+		self.bin_stats = None
+		if streaming:
+			self.bin_stats = binstats.BinStats(len(self.wind_speeds) * len(self.wind_angles))
 
 		self.polar = {}
 		for speed in self.wind_speeds:
@@ -105,7 +139,187 @@ class BoatPolar:
 					best_delta = delta
 					angle_bin = angle
 
-			self.bins[speed_bin][angle_bin].append(bsp)
+			cell = self.cell_index(self.wind_speeds.index(speed_bin), self.wind_angles.index(angle_bin))
+			if self.bin_stats is not None:
+				self.bin_stats.add([cell], [bsp])
+			else:
+				self.bin_data.append(bsp)
+				self.bin_cells.append(cell)
+
+	#bin_speeds() on whole arrays of twa/tws/bsp at once, puts every sample in the same bin bin_speeds() would.
+	def bin_all_speeds(self, twa, tws, bsp):
+		bsp = np.asarray(bsp, dtype='float64')
+		cells = self.cell_index(nearest_bins(tws, self.wind_speeds), nearest_bins(twa, self.wind_angles))
+
+		if self.bin_stats is not None:
+			self.bin_stats.add(cells, bsp)
+			return
+
+		self.bin_data.frombytes(bsp.tobytes())
+		self.bin_cells.frombytes(cells.astype('uint16').tobytes())
+
+	#which cell the samples for a tws/twa bin (by position in wind_speeds/wind_angles) are stored in
+	def cell_index(self, speed_bin, angle_bin):
+		return speed_bin * len(self.wind_angles) + angle_bin
+
+	#count, median, std dev and the +/- 1 standard deviation filtered mean of every bin, rounded the same way as the polars.
+	#everything gets grouped by bin and sorted once, then worked out for all of the bins together.
+	#returns a dict of arrays, by cell_index()
+	def bin_summary(self):
+		cell_count = len(self.wind_speeds) * len(self.wind_angles)
+		summary = {}
+
+		#running stats only have approximate medians and filtered means
+		if self.bin_stats is not None:
+			count = self.bin_stats.count
+			summary['count'] = count
+			summary['stddev'] = np.round(self.bin_stats.stddev(), 3)
+			summary['median'] = np.round([self.bin_stats.median(cell) if count[cell] else np.nan for cell in range(cell_count)], 2)
+			low = summary['median'] - summary['stddev']
+			high = summary['median'] + summary['stddev']
+			summary['mean'] = np.round([self.bin_stats.filtered_mean(cell, low[cell], high[cell]) if count[cell] else np.nan for cell in range(cell_count)], 2)
+			return summary
+
+		#our samples grouped by bin, in the order they were binned
+		cells = np.array(self.bin_cells, dtype='int64')
+		order = np.argsort(cells, kind='stable')
+		cells = cells[order]
+		data = np.array(self.bin_data, dtype='float64')[order]
+		starts = np.searchsorted(cells, np.arange(cell_count + 1))
+		count = np.diff(starts)
+		summary['count'] = count
+
+		with np.errstate(invalid='ignore', divide='ignore'):
+			#numpy.std()
+			mean = sum_cells(data, starts) / count
+			summary['stddev'] = np.round(np.sqrt(sum_cells((data - mean[cells]) ** 2, starts) / count), 3)
+
+			#numpy.median(), which averages the middle two when there's an even number
+			ordered = data[np.lexsort((data, cells))]
+			if len(ordered):
+				lower = np.minimum(starts[0:-1] + (count - 1) // 2, len(ordered) - 1)
+				upper = np.minimum(starts[0:-1] + count // 2, len(ordered) - 1)
+				summary['median'] = np.round(np.where(count > 0, (ordered[lower] + ordered[upper]) / 2, np.nan), 2)
+			else:
+				summary['median'] = np.full(cell_count, np.nan)
+
+			#the average of everything within +/- 1 standard deviation of the median
+			low = summary['median'] - summary['stddev']
+			high = summary['median'] + summary['stddev']
+			keep = (data >= low[cells]) & (data <= high[cells])
+			filtered_starts = np.searchsorted(cells[keep], np.arange(cell_count + 1))
+			summary['mean'] = np.round(sum_cells(data[keep], filtered_starts) / np.diff(filtered_starts), 2)
+
+		return summary
+
+	#save a histogram of the boat speeds in graph_dir for each bin that made it into our last generate_polars()
+	def plot_histograms(self, graph_dir):
+		if self.bin_stats is None:
+			bins = self.get_bins()
+
+		for speed, angle, bin_mean, bin_stddev, bin_count in self.histograms:
+			#std dev lines
+			plt.axvline(x=bin_mean, c='red', label="BSP ({})".format(bin_mean), linewidth=0.5, zorder=3, alpha = 0.5)
+			plt.axvspan(bin_mean-bin_stddev, bin_mean+bin_stddev, color='red', linewidth=0, alpha=0.1, zorder=3, label = '+/- 1 Sigma')
+
+			#plot the histogram
+			if self.bin_stats is None:
+				x = bins[speed][angle]
+				plt.hist(x, bins=50, zorder=2)
+			else:
+				centers, counts = self.bin_stats.cell_histogram(self.cell_index(self.wind_speeds.index(speed), self.wind_angles.index(angle)))
+				plt.hist(centers, bins=50, weights=counts, zorder=2)
+
+			#set our titles and axes.
+			title = '{}kts TWS @ {} TWA ({} Total Points)'.format(speed, angle, bin_count)
+			plt.gca().set(title=title, ylabel='Count');
+			ax = plt.gca()
+			ax.set_xlim([0, 15])
+			plt.legend()
+
+			#okay, actually save
+			graph_output_file = "{}/histogram-{}TWS-{}TWA.png".format(graph_dir, speed, angle)
+			plt.savefig(graph_output_file, bbox_inches='tight', dpi =600)
+
+			plt.clf()
+			plt.close()
+
+	#add the binned boat speeds from another BoatPolar to ours, they go after the ones we already have
+	def merge_bins(self, other):
+		if other.wind_speeds != self.wind_speeds or other.wind_angles != self.wind_angles:
+			raise ValueError("Can't merge bins from a polar with different wind speeds or angles")
+		if (other.bin_stats is None) != (self.bin_stats is None):
+			raise ValueError("Can't merge streaming and non-streaming bins")
+
+		if self.bin_stats is not None:
+			self.bin_stats.merge(other.bin_stats)
+		else:
+			self.bin_data.extend(other.bin_data)
+			self.bin_cells.extend(other.bin_cells)
+
+	#save our binned boat speeds (or running stats) to a compressed .npz file so they can be merge_bins()'d later.
+	#the running stats histograms are mostly zeros, so they shrink down to almost nothing.
+	def save_bins(self, filename):
+		data = {}
+		data['wind_speeds'] = np.array(self.wind_speeds, dtype='float64')
+		data['wind_angles'] = np.array(self.wind_angles, dtype='float64')
+		if self.bin_stats is not None:
+			data['step'] = np.array(self.bin_stats.step)
+			data['count'] = self.bin_stats.count
+			data['mean'] = self.bin_stats.mean
+			data['m2'] = self.bin_stats.m2
+			data['histogram'] = self.bin_stats.histogram
+		else:
+			data['bin_data'] = np.array(self.bin_data, dtype='float64')
+			data['bin_cells'] = np.array(self.bin_cells, dtype='uint16')
+
+		#write it somewhere else first so a half written file never gets loaded
+		mydir = os.path.dirname(filename)
+		if mydir and not os.path.exists(mydir):
+			os.makedirs(mydir)
+
+		temp_file = filename + '.tmp'
+		with open(temp_file, 'wb') as fp:
+			np.savez_compressed(fp, **data)
+		os.replace(temp_file, filename)
+
+	#load bins written by save_bins() in place of ours, streaming or not depending on how they were saved
+	def load_bins(self, filename):
+		with np.load(filename) as data:
+			if data['wind_speeds'].tolist() != self.wind_speeds or data['wind_angles'].tolist() != self.wind_angles:
+				raise ValueError("{} has different wind speeds or angles".format(filename))
+
+			self.bin_data = array.array('d')
+			self.bin_cells = array.array('H')
+			self.bin_stats = None
+
+			if 'histogram' in data:
+				histogram = data['histogram']
+				self.bin_stats = binstats.BinStats(histogram.shape[0], float(data['step']), histogram.shape[1] * float(data['step']))
+				self.bin_stats.count = data['count']
+				self.bin_stats.mean = data['mean']
+				self.bin_stats.m2 = data['m2']
+				self.bin_stats.histogram = histogram
+			else:
+				self.bin_data.frombytes(data['bin_data'].astype('float64').tobytes())
+				self.bin_cells.frombytes(data['bin_cells'].astype('uint16').tobytes())
+
+	#our binned boat speeds as a dict of tws -> twa -> numpy array, in the order they were binned.
+	#everything gets sorted by cell once, so each cell is just a slice of the sorted data.
+	def get_bins(self):
+		cells = np.array(self.bin_cells, dtype='uint16')
+		order = np.argsort(cells, kind='stable')
+		data = np.array(self.bin_data, dtype='float64')[order]
+		starts = np.searchsorted(cells[order], np.arange(len(self.wind_speeds) * len(self.wind_angles) + 1))
+
+		bins = {}
+		for speed_bin, speed in enumerate(self.wind_speeds):
+			bins[speed] = {}
+			for angle_bin, angle in enumerate(self.wind_angles):
+				cell = self.cell_index(speed_bin, angle_bin)
+				bins[speed][angle] = data[starts[cell]:starts[cell + 1]]
+
+		return bins
 
 	def load_polar(self, fp):
 
@@ -196,15 +410,21 @@ class BoatPolar:
 		polars['mean'] = BoatPolar()
 		polars['count'] = BoatPolar()
 		polars['stddev'] = BoatPolar()
+
+		#crunch the numbers for every bin at once
+		summary = self.bin_summary()
+
+		#the bins that make it into the polars, for plot_histograms()
+		self.histograms = []
 		
 		#loop through twa/tws
-		for speed in self.wind_speeds:
-			for angle in self.wind_angles:
-					#get our datapoints
-					mybin = self.bins[speed][angle]
+		for speed_bin, speed in enumerate(self.wind_speeds):
+			for angle_bin, angle in enumerate(self.wind_angles):
+					cell = self.cell_index(speed_bin, angle_bin)
+					bin_count = int(summary['count'][cell])
 
 					#do we have enough?
-					if len(mybin) >= 50:
+					if bin_count >= 50:
 
 						#filter here on twa/tws
 						if speed < self.tws_min or speed > self.tws_max:
@@ -214,19 +434,9 @@ class BoatPolar:
 							print("TWA LIMIT - TWA: {} TWS: {}".format(angle, speed))
 							continue
 
-						#calculationes
-						bin_mean = round(numpy.average(self.bins[speed][angle]), 2)
-						bin_count = len(mybin)
-						bin_median = round(numpy.median(self.bins[speed][angle]), 2)
-						bin_stddev = round(numpy.std(self.bins[speed][angle]), 3)
-
-						#run our average on +/- 1 standard deviation
-						filtered = []
-						for sog in self.bins[speed][angle]:
-							if sog >= bin_median - bin_stddev and sog <= bin_median + bin_stddev:
-								filtered.append(sog)
-						filtered_count = len(filtered)
-						bin_mean = round(numpy.average(filtered), 2)
+						#our average on +/- 1 standard deviation around the median
+						bin_mean = summary['mean'][cell]
+						bin_stddev = summary['stddev'][cell]
 
 						#filter here on awa/aws
 						awa, aws = self.calculate_single_apparent(angle, speed, bin_mean)
@@ -241,36 +451,12 @@ class BoatPolar:
 						polars['mean'].set_speed(angle, speed, bin_mean)
 						polars['count'].set_speed(angle, speed, bin_count)
 						polars['stddev'].set_speed(angle, speed, bin_stddev)
-						
-						#
-						# Only Graph After Here
-						#
-
-						#std dev lines
-						plt.axvline(x=bin_mean, c='red', label="BSP ({})".format(bin_mean), linewidth=0.5, zorder=3, alpha = 0.5)
-						plt.axvspan(bin_mean-bin_stddev, bin_mean+bin_stddev, color='red', linewidth=0, alpha=0.1, zorder=3, label = '+/- 1 Sigma')
-
-						#plot the histogram
-						x = self.bins[speed][angle]
-						plt.hist(x, bins=50, zorder=2)
-
-						#set our titles and axes.
-						title = '{}kts TWS @ {} TWA ({} Total Points)'.format(speed, angle, len(mybin))
-						plt.gca().set(title=title, ylabel='Count');
-						ax = plt.gca()
-						ax.set_xlim([0, 15])
-						plt.legend()
-
-						#should we show interactive?
-						#plt.show()
-
-						#okay, actually save
-						if graph_dir:
-							graph_output_file = "{}/histogram-{}TWS-{}TWA.png".format(graph_dir, speed, angle)
-							plt.savefig(graph_output_file, bbox_inches='tight', dpi =600)
-
-						plt.clf()
-						plt.close()
+
+						self.histograms.append((speed, angle, bin_mean, bin_stddev, bin_count))
+
+		#graph the bins we used
+		if graph_dir:
+			self.plot_histograms(graph_dir)
 
 		#figure out our vmg
 		polars['vmg'] = polars['mean'].calculate_vmg()
@@ -16,15 +16,19 @@ __status__ = "Beta"
 
 import argparse
 import os
+import functools
+import multiprocessing
+import tracemalloc
 import json
-import datetime
+import hashlib
 import time
-import numpy
 import csv
 import math
 from pprint import pprint
-import nmea0183
+import polarlog
+import logfile
 import boatpolar
+import streamfilter
 
 from scipy import signal
 import pandas as pd
@@ -32,7 +36,362 @@ import numpy as np
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 
-from dateutil import tz
+#read, filter, resample and graph a single log file.  returns the samples to bin and our stats, without any samples if there was no data.
+#this runs in a worker process with --jobs, so it can't touch the BoatPolar directly.
+#jobs > 1 splits up the log itself, for when we only have one big file.
+def process_file(myfile, args, use_sog=False, jobs=1):
+	stats = polarlog.LogStats()
+
+	#read in all our data
+	print("Parsing '{}'".format(myfile))
+	channels = polarlog.read_log(myfile, use_sog, args.cache_dir if args.cache else None, jobs, args.window, stats)
+	twa_ds = channels['twa']
+	tws_ds = channels['tws']
+	bsp_ds = channels['bsp']
+
+	stats.count('twa_samples', len(twa_ds))
+	stats.count('tws_samples', len(tws_ds))
+	stats.count('bsp_samples', len(bsp_ds))
+	
+	if not len(twa_ds) or not len(tws_ds) or not len(bsp_ds):
+		print("No data in file.")
+		return {'stats': stats}
+
+	#what was our max boat speed?
+	max_bsp = bsp_ds.max()
+
+	#filter and resample everything, in pieces if there are gaps in the data
+	twa_final, tws_final, bsp_final = smooth_channels((twa_ds, tws_ds, bsp_ds), args, stats, jobs)
+	if args.max_gap and (not len(twa_final) or not len(tws_final) or not len(bsp_final)):
+		print("Not enough data in file.")
+		return {'stats': stats}
+
+	#print("Raw Data")
+	#print(bsp_ds)
+	#print(bsp_ds.describe())
+	
+	#print("Resampled")
+	#print(bsp_final)
+	#print(bsp_final.describe())
+	
+	#okay, now line up all of our data on the boat speed times for binning
+	stats.start('bin')
+	bsp_data, twa_data, tws_data = polarlog.align(bsp_final, twa_final, tws_final)
+
+	#make sure we got all 3 values and they are valid
+	valid = (twa_data != 0) & (tws_data != 0) & ~np.isnan(twa_data) & ~np.isnan(tws_data) & ~np.isnan(bsp_data)
+	twa_data = twa_data[valid]
+	tws_data = tws_data[valid]
+	bsp_data = bsp_data[valid]
+	stats.stop('bin')
+
+	#
+	# Graphs below
+	#
+
+	stats.start('plot')
+			
+	scatter_size = 1.0
+	line_size = 1.0
+	
+	#reset our graph.
+	#plt.figure()
+	fig, (twa_ax, tws_ax, bsp_ax) = plt.subplots(3)
+	fig.suptitle("{} ({} Points)".format(os.path.basename(myfile), len(tws_ds.index)))
+
+	#plot our data
+	tws_ds.plot(ax=tws_ax, c='#00bf00', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
+	#tws_rolling.plot(ax=tws_ax, c='orange', label='Rolling', linewidth=line_size)
+	#tws_butter.plot(ax=tws_ax, c='purple', label='Filtered', linewidth=line_size)
+	tws_final.plot(ax=tws_ax, c='black', label='Resampled', linewidth=line_size)
+
+	#show 0kts as base
+	tws_ax.set_ylim([0, None])
+	tws_ax.set(ylabel='TWS')
+	tws_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+	tws_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
+
+	#this is to format the x/y info in interactive mode
+	def format_tws(x, y):
+		formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
+		text = formatter.format_data(x)
+		return "{} TWS: {:.2f}".format(text, y)
+	tws_ax.format_coord = format_tws
+	
+	#plot our data
+	twa_ds.plot(ax=twa_ax, c='#bf0000', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
+	#twa_rolling.plot(ax=twa_ax, c='orange', label='Rolling', linewidth=line_size)
+	#twa_butter.plot(ax=twa_ax, c='purple', label='Filtered', linewidth=line_size)
+	twa_final.plot(ax=twa_ax, c='black', label='Resampled', linewidth=line_size)
+
+	#show 0kts as base
+	twa_ax.set_ylim([0, None])
+	twa_ax.set(ylabel='TWA')
+	twa_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+	twa_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
+
+	#this is to format the x/y info in interactive mode
+	def format_twa(x, y):
+		formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
+		text = formatter.format_data(x)
+		return "{} TWA: {}".format(text, round(y))
+	twa_ax.format_coord = format_twa
+
+	#plot our data
+	bsp_ds.plot(ax=bsp_ax, c='#0000bf', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
+	#bsp_rolling.plot(ax=bsp_ax, c='orange', label='Rolling', linewidth=line_size)
+	#bsp_butter.plot(ax=bsp_ax, c='purple', label='Filtered', linewidth=line_size)
+	bsp_final.plot(ax=bsp_ax, c='black', label='Resampled', linewidth=line_size)
+
+	#show 0kts as base
+	bsp_ax.set_ylim([0, None])
+	bsp_ax.set(ylabel='BSP')
+	bsp_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+	bsp_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
+
+	#this is to format the x/y info in interactive mode
+	def format_bsp(x, y):
+		formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
+		text = formatter.format_data(x)
+		return "{} BSP: {:.2f}".format(text, y)
+	bsp_ax.format_coord = format_bsp
+	
+	#auto format our date ticks.
+	plt.setp(tws_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
+	plt.setp(twa_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
+	plt.setp(bsp_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
+
+    	#give us a nicely spaced set of graphs
+	fig.tight_layout()    
+
+	#where to save it?
+	file_parts = os.path.split(myfile)
+	category = os.path.basename(file_parts[0])
+	graph_output_dir = "graphs/{}".format(category)
+
+	if not os.path.exists(graph_output_dir):
+		os.makedirs(graph_output_dir)
+		
+	#okay, actually save
+	graph_output_file = "{}/data-{}.png".format(graph_output_dir, file_parts[1])
+	plt.savefig(graph_output_file, bbox_inches='tight', dpi=600)
+	print("Writing data graph to {}. {} points".format(graph_output_file, len(twa_ds)))
+
+	#do we want to show the interactive one?
+	if args.graph:
+		plt.show()
+
+	#finally, clear our graph for the next one
+	plt.clf()
+	plt.close()
+	stats.stop('plot')
+
+	#everything the main process needs to bin this file, in the same order we would have binned it
+	result = {}
+	result['twa'] = twa_data
+	result['tws'] = tws_data
+	result['bsp'] = bsp_data
+	result['max_bsp'] = max_bsp
+	result['points'] = len(twa_ds)
+	result['category'] = category
+	result['graph_output_dir'] = graph_output_dir
+	result['stats'] = stats
+
+	return result
+
+#the butterworth filter pads 12 samples on each end, so it needs more than that
+MIN_SEGMENT_SAMPLES = 13
+
+#how many seconds at each end of the data are sketchy from averaging, extrapolation... after filtering
+def trim_seconds(args):
+	if args.filter == 'rolling':
+		return args.filter_seconds
+	elif args.filter == 'butter' or args.filter == 'causal':
+		return math.ceil(1 / args.filter_hz)
+	else:
+		return 0
+
+#filter a single channel with whatever --filter we picked
+def filter_series(series, args):
+	#do we want a rolling 10s filter?
+	if args.filter == 'rolling':
+		#how many seconds to filter over?
+		seconds = args.filter_seconds
+
+		#do our rolling average
+		return series.rolling('{}s'.format(seconds), center=True).mean()
+	#do we want a buttery filter?
+	elif args.filter == 'butter' and not args.filter_chunk:
+		#do our butterworth filter
+		b = signal.butter(3, args.filter_hz, analog=False)
+		fd = signal.filtfilt(*b, series.array, padtype='constant')
+
+		return pd.Series(data=fd, index=series.index)
+	#or the same thing a chunk at a time, or a causal one?
+	elif args.filter == 'butter' or args.filter == 'causal':
+		return stream_filter(series, args)
+	#or just the raw data?
+	else:
+		return series
+
+#filter, resample to give us regular data every second, and trim the sketchy ends off of one channel.  returns the result and our stats.
+def smooth_series(series, args):
+	stats = polarlog.LogStats()
+
+	stats.start('filter')
+	filtered = filter_series(series, args)
+	stats.stop('filter')
+
+	stats.start('resample')
+	seconds = trim_seconds(args)
+	resampled = filtered.resample('1s').mean()
+	final = resampled[seconds:-seconds]
+	stats.stop('resample')
+
+	return final, stats
+
+#smooth_series() a list of channels.  with --max_gap each channel gets split up wherever the data stops for a while,
+#and each piece gets smoothed on its own, so we don't filter across the gap or resample a big empty grid.
+#the pieces run in parallel if we have jobs for it.
+def smooth_channels(channels, args, stats, jobs=1):
+	seconds = trim_seconds(args)
+
+	pieces = []
+	for channel, series in enumerate(channels):
+		if args.max_gap:
+			for segment in polarlog.split_gaps(series, args.max_gap):
+				#skip anything too short to filter, or that wouldn't have anything left once we trim the ends
+				if len(segment) >= MIN_SEGMENT_SAMPLES and (segment.index[-1] - segment.index[0]).total_seconds() > 2 * seconds:
+					pieces.append((channel, segment))
+		else:
+			pieces.append((channel, series))
+
+	if jobs > 1 and len(pieces) > 1:
+		with multiprocessing.Pool(min(jobs, len(pieces))) as pool:
+			results = pool.starmap(smooth_series, [(series, args) for channel, series in pieces])
+	else:
+		results = [smooth_series(series, args) for channel, series in pieces]
+
+	#put each channel back together, in order
+	smoothed = []
+	for channel, series in enumerate(channels):
+		parts = []
+		for (piece_channel, piece), (final, piece_stats) in zip(pieces, results):
+			if piece_channel == channel:
+				parts.append(final)
+				stats.merge(piece_stats)
+
+		if len(parts) > 1:
+			smoothed.append(pd.concat(parts))
+		elif len(parts) == 1:
+			smoothed.append(parts[0])
+		else:
+			smoothed.append(series.iloc[0:0])
+
+	return smoothed
+
+#run a series through one of our streaming butterworth filters, --filter_chunk samples at a time
+def stream_filter(series, args):
+	chunks = streamfilter.chunks_of(series.to_numpy(dtype='float64'), args.filter_chunk or len(series))
+	if args.filter == 'causal':
+		filtered = streamfilter.causal_filter(chunks, args.filter_hz)
+	else:
+		filtered = streamfilter.chunked_filtfilt(chunks, args.filter_hz)
+
+	#the output is the same length as the input, so fill it in as the chunks come out instead of keeping them all around
+	output = np.empty(len(series), dtype='float64')
+	position = 0
+	for chunk in filtered:
+		output[position:position + len(chunk)] = chunk
+		position += len(chunk)
+
+	return pd.Series(data=output, index=series.index)
+
+#bump this if the saved bins change, old ones get ignored and pruned
+BINS_VERSION = 2
+
+#where we save the binned data for a log file.  the name covers every setting that changes how a log gets binned,
+#so different settings each get their own.  the twa/tws/awa/aws limits only get applied afterwards, so they don't count.
+def bins_path(cache_dir, myfile, args, use_sog=False):
+	settings = [os.path.abspath(myfile), use_sog, args.filter, args.filter_seconds, args.filter_hz, args.filter_chunk, args.max_gap, args.start, args.end, args.streaming]
+	digest = hashlib.sha1(json.dumps(settings).encode('utf-8')).hexdigest()[0:16]
+	return os.path.join(cache_dir, 'bins', "{}-{}".format(os.path.basename(myfile), digest))
+
+#load the saved bins for a log file if they are still good.  returns (BoatPolar, result) or None
+def load_bins(path, signature):
+	try:
+		with open(path + '.json') as fp:
+			meta = json.load(fp)
+	except (OSError, ValueError):
+		return None
+
+	if meta.get('version') != BINS_VERSION or meta.get('size') != signature['size'] or meta.get('mtime_ns') != signature['mtime_ns']:
+		return None
+
+	file_bp = boatpolar.BoatPolar()
+	try:
+		file_bp.load_bins(path + '.npz')
+	except (OSError, ValueError, KeyError):
+		return None
+
+	return file_bp, meta['result']
+
+#save the bins for a log file, along with what we need from its result.
+#the .json goes last, so half written bins never look valid.
+def save_bins(path, myfile, signature, file_bp, result):
+	meta = {}
+	meta['version'] = BINS_VERSION
+	meta['size'] = signature['size']
+	meta['mtime_ns'] = signature['mtime_ns']
+	meta['log'] = os.path.abspath(myfile)
+	meta['result'] = {}
+	if 'points' in result:
+		meta['result']['max_bsp'] = float(result['max_bsp'])
+		meta['result']['points'] = int(result['points'])
+		meta['result']['category'] = result['category']
+		meta['result']['graph_output_dir'] = result['graph_output_dir']
+
+	if os.path.exists(path + '.json'):
+		os.remove(path + '.json')
+
+	file_bp.save_bins(path + '.npz')
+
+	with open(path + '.json', 'w') as fp:
+		json.dump(meta, fp)
+
+#delete saved bins for logs that don't exist anymore, or that an older version wrote, so the cache doesn't grow forever
+def prune_bins(cache_dir):
+	bins_dir = os.path.join(cache_dir, 'bins')
+	if not os.path.isdir(bins_dir):
+		return
+
+	#.npz, .json, and any .npz.tmp left over from a crash
+	extensions = ('.json', '.npz', '.npz.tmp')
+	names = set()
+	for fname in os.listdir(bins_dir):
+		for extension in extensions:
+			if fname.endswith(extension):
+				names.add(fname[0:-len(extension)])
+
+	for name in names:
+		path = os.path.join(bins_dir, name)
+		try:
+			with open(path + '.json') as fp:
+				meta = json.load(fp)
+		except (OSError, ValueError):
+			meta = {}
+
+		if meta.get('version') == BINS_VERSION and os.path.exists(meta.get('log', '')) and os.path.exists(path + '.npz'):
+			continue
+
+		print("Removing saved bins {}".format(path))
+		for extension in extensions:
+			if os.path.exists(path + extension):
+				os.remove(path + extension)
+
+#worker processes only ever save graphs, never show them
+def init_worker():
+	plt.switch_backend('Agg')
 
 def main():
 	#these are our command line arguments
@@ -41,9 +400,11 @@ def main():
 	parser.add_argument('-p', '--polar', action='store', help='Sailset configuration name. Not needed if parsing a directory.')
 	parser.add_argument('-d', '--dir', action='store', help='Directory to parse.  Will use name of directory as sailset configuration name.')
 	parser.add_argument('-g', '--graph', default=False, action='store_true', help="Show interactive graph. Will always automatically generate .png graph images.")
-	parser.add_argument('--filter', default='butter', help="What kind of filter to use. 'rolling' = Rolling average.  'butter' = Butterworth filter. 'none' = No Filter.")
+	parser.add_argument('--filter', default='butter', help="What kind of filter to use. 'rolling' = Rolling average.  'butter' = Butterworth filter. 'causal' = One way Butterworth filter, it lags a little but can run on data as it comes in. 'none' = No Filter.")
 	parser.add_argument('--filter_seconds', default=10, type=int, help="How many seconds for the rolling filter. Default is 10s")
 	parser.add_argument('--filter_hz', default=0.10, type=float, help="What hz to use for the Butterworth filter.  Default is 0.1hz.  Lower is smoother")
+	parser.add_argument('--filter_chunk', default=0, type=int, help="Run the Butterworth filters this many samples at a time, so they use less memory.  Default is 0, all at once.")
+	parser.add_argument('--max_gap', default=0, type=int, help="Split the data wherever there's a gap of more than this many seconds, and filter and resample each piece separately.  Default is 0, never split.")
 	parser.add_argument('--twa_min', action='store', default = 0, type=int, help="Minimum TWA to generate polars for, inclusive")
 	parser.add_argument('--twa_max', action='store', default = 180, type=int, help="Maximum TWA to generate polars for, inclusive.")
 	parser.add_argument('--tws_min', action='store', default = 0, type=int, help="Minimum TWS to generate polars for, inclusive")
@@ -52,10 +413,42 @@ def main():
 	parser.add_argument('--awa_max', action='store', default = 180, type=int, help="Maximum AWA to generate polars for, inclusive.")
 	parser.add_argument('--aws_min', action='store', default = 0, type=int, help="Minimum AWS to generate polars for, inclusive")
 	parser.add_argument('--aws_max', action='store', default = 40, type=int, help="Maximum AWS to generate polars for, inclusive.")
+	parser.add_argument('--start', action='store', help="Only use data from this time on, eg. 2022-01-08T00:20:00.  NMEA logs use the local time, Signal K logs use UTC.")
+	parser.add_argument('--end', action='store', help="Only use data up to this time, inclusive.")
+	parser.add_argument('--stats-json', dest='stats_json', action='store', help="Write a report of what we read and how long each stage took, per file and in total, to this JSON file.  Measuring memory makes everything slower.")
+	parser.add_argument('--cache_dir', action='store', default='cache', help="Where to keep decoded log data so we don't have to parse it again.  Default is 'cache'")
+	parser.add_argument('-j', '--jobs', action='store', default=1, type=int, help="How many log files to process at once, or pieces to split a single big log into.  Interactive graphs (-g) always run one at a time.  Default is 1")
+	parser.add_argument('--streaming', action='store_true', help="Only keep running statistics for each polar bin instead of every data point, so memory stays the same however much data you have.  The mean polar becomes approximate, usually within 0.01 kts and up to about 0.03 kts in some bins.")
+	parser.add_argument('--no_cache', dest='cache', default=True, action='store_false', help="Always parse and bin the log files, don't read or write the cache.")
 
 	args = parser.parse_args()
+
+	#keep track of how everything goes?
+	if args.stats_json:
+		tracemalloc.start()
+	run_start = time.perf_counter()
+	total_stats = polarlog.LogStats()
+	file_stats = {}
+
+	#are we only looking at part of the logs?
+	window_start = None
+	window_end = None
+	if args.start:
+		window_start = polarlog.parse_time(args.start)
+		if window_start is None:
+			print ("Could not understand start time %s" % (args.start))
+			return False
+	if args.end:
+		window_end = polarlog.parse_time(args.end)
+		if window_end is None:
+			print ("Could not understand end time %s" % (args.end))
+			return False
+
+	args.window = None
+	if window_start or window_end:
+		args.window = (window_start, window_end)
 	
-	bp = boatpolar.BoatPolar()
+	bp = boatpolar.BoatPolar(streaming=args.streaming)
 	files = []
 	polar_name = 'unknown'
 	
@@ -76,8 +469,7 @@ def main():
 			files.append(args.file)
 
 		#try to make a good default
-		parts = os.path.basename(args.file).split('.')
-		polar_name = '.'.join(parts[0:-1])
+		polar_name = logfile.log_name(os.path.basename(args.file))
 
 	#a directory of files?
 	elif args.dir:
@@ -90,7 +482,7 @@ def main():
 		polar_name = os.path.basename(path)
 		dirfiles = os.listdir(path)
 		for fname in dirfiles:
-			if fname.endswith('.txt'):
+			if logfile.is_log(fname):
 				files.append(os.path.join(path, fname))
 		
 		if len(files) == 0:
@@ -104,310 +496,80 @@ def main():
 	#what is our maximum boat speed we saw?
 	max_bsp = 0
 		
+	#logs we have already binned with the same settings, and haven't changed since, don't need to be processed again.
+	#interactive graphs (-g) always process everything so there is something to look at.
+	use_bins = args.cache and not args.graph
+	saved = {}
+	signatures = {}
+	if use_bins:
+		prune_bins(args.cache_dir)
+		for myfile in files:
+			stats = polarlog.LogStats()
+			stats.start('cache')
+			signatures[myfile] = polarlog.file_signature(myfile)
+			saved[myfile] = load_bins(bins_path(args.cache_dir, myfile, args, use_sog), signatures[myfile])
+			stats.stop('cache')
+			if saved[myfile] is not None:
+				stats.count('bins_hits')
+				file_stats[myfile] = stats
+	todo = [myfile for myfile in files if saved.get(myfile) is None]
+
+	#read our files in parallel, but always bin them in order so we get the same polars as a serial run.
+	#otherwise any extra jobs go to splitting up each file.
+	if args.jobs > 1 and len(todo) > 1 and not args.graph:
+		pool = multiprocessing.Pool(min(args.jobs, len(todo)), initializer=init_worker)
+		results = pool.imap(functools.partial(process_file, args=args, use_sog=use_sog), todo)
+	else:
+		pool = None
+		results = (process_file(myfile, args, use_sog, args.jobs) for myfile in todo)
+
 	#loop through all our data files
 	for myfile in files:
-		#our arrays
-		twa_data = []
-		tws_data = []
-		bsp_data = []
-		
-		twa_time = []
-		tws_time = []
-		bsp_time = []
-	
-		#our data series
-		#twa_ds = pd.Series(dtype='float')
-		#tws_ds = pd.Series(dtype='float')
-		#bsp_ds = pd.Series(dtype='float')
-
-		local_tz = None
-
-		#open our file for reading
-		print("Parsing '{}'".format(myfile))
-		fp = open(myfile)
-		while True:
-
-			#read lines until the end of file.
-			json_line = fp.readline()
-			if json_line == '':
-				break;
-			
-			try:
-				data = json.loads(json_line)
-			except ValueError as e:
-				continue
-			
-			bsp = 0.0
-			sog = 0.0
-			twa = 0.0
-			tws = 0.0
-			
-			#What about NMEA0183 logs?
-			if 'lines' in data and data['lines'] is not None:
-				for line in data['lines']:
-
-					# run it through our parser
-					nmea = nmea0183.nmea0183()
-					output = nmea.parseline(line)
-
-					#only use ones that have the unix time now.
-					if 'unix_time' in data:
-						#just use the unix timestamp - fast, but we lose timezone info.
-						unix_time = float(data['unix_time'])
-						local_tz = tz.gettz(data['timezone'])
-						pd_time = datetime.datetime.utcfromtimestamp(data['unix_time'])
-						pd_time = pd_time.replace(tzinfo=local_tz)
-					else:
-						#convert the human timestamp - needed if you want to edit the data
-						pd_time = pd.to_datetime(data['time'])
-					
-					#lets only parse valid strings
-					if not nmea.valid:
-						#print(line)
-						continue
-
-					#is it a known code?
-					if not nmea.known:
-						#pprint(output)
-						continue
-
-					#wind speed...
-					if 'tws' in output and 'twa' in output:
-						twa = float(output['twa'])
-						tws = float(output['tws'])
-
-						twa_data.append({'time': pd_time, 'data': twa})
-						tws_data.append({'time': pd_time, 'data': tws})
-							
-					#boat speed... use SOG
-					if use_sog:
-						if 'sog' in output and nmea.sentence == 'RMC' and output['sog']:
-							bsp = float(output['sog'])
-							bsp_data.append({'time': pd_time, 'data': bsp})
-					#or otherwise use BSP
-					else:
-						if 'water_speed' in output and nmea.sentence == 'VHW' and output['water_speed']:
-							bsp = float(output['water_speed'])
-							bsp_data.append({'time': pd_time, 'data': bsp})
-			#what about Signal K?
-			elif 'updates' in data and data['updates'] is not None:
-				for update in data['updates']:
-					
-					path = update['values'][0]['path']
-					value = float(update['values'][0]['value'])
-					pd_time = pd.to_datetime(update['timestamp'])
-
-					if use_sog:
-						if path == 'navigation.speedOverGround':
-							sog = round(value * 1.94384, 1)
-							bsp_data.append({'time': pd_time, 'data': bsp})
-					else:
-						if path == 'navigation.speedThroughWater':
-							bsp = round(value * 1.94384, 1)
-							bsp_data.append({'time': pd_time, 'data': bsp})
-
-					if path == 'environment.wind.speedTrue':
-						tws = round(value * 1.94384, 1)
-						tws_data.append({'time': pd_time, 'data': tws})
-
-					if path == 'environment.wind.angleTrueWater':
-						twa = round(math.degrees(value))
-						twa_data.append({'time': pd_time, 'data': twa})
-					
-			else:
-				print ("Empty lines...")
-
-		fp.close()	
-		
-		if not len(twa_data) or not len(tws_data) or not len(bsp_data):
-			print("No data in file.")
-			continue
-			
-		#make our dataframes		
-		twa_pd = pd.DataFrame.from_records(twa_data, index='time')
-		tws_pd = pd.DataFrame.from_records(tws_data, index='time')
-		bsp_pd = pd.DataFrame.from_records(bsp_data, index='time')
+		if saved.get(myfile) is not None:
+			file_bp, result = saved[myfile]
+			print("Using saved bins for '{}'".format(myfile))
 
-		#convert it to a series.
-		twa_ds = twa_pd.squeeze()
-		tws_ds = tws_pd.squeeze()
-		bsp_ds = bsp_pd.squeeze()
-
-		#what was our max boat speed?
-		max_bsp = bsp_ds.max()
-
-		#do we want a rolling 10s filter?
-		if args.filter == 'rolling':
-			#how many seconds to filter over?
-			seconds = args.filter_seconds
-
-			#do our rolling average
-			twa_rolling = twa_ds.rolling('{}s'.format(seconds), center=True).mean()
-			tws_rolling = tws_ds.rolling('{}s'.format(seconds), center=True).mean()
-			bsp_rolling = bsp_ds.rolling('{}s'.format(seconds), center=True).mean()
-
-			#save the result
-			twa_filt = twa_rolling
-			tws_filt = tws_rolling
-			bsp_filt = bsp_rolling
-		#do we want a buttery filter?
-		elif args.filter == 'butter':
-			#do our butterworth filter
-			hz = args.filter_hz
-			seconds = math.ceil(1 / hz)
-			b = signal.butter(3, hz, analog=False)
-
-			fd = signal.filtfilt(*b, twa_ds.array, padtype='constant')
-			twa_butter = pd.Series(data=fd, index=twa_ds.index)
-			fd = signal.filtfilt(*b, tws_ds.array, padtype='constant')
-			tws_butter = pd.Series(data=fd,index=tws_ds.index)
-			fd = signal.filtfilt(*b, bsp_ds.array, padtype='constant')
-			bsp_butter = pd.Series(data=fd,index=bsp_ds.index)
-
-			twa_filt = twa_butter
-			tws_filt = tws_butter
-			bsp_filt = bsp_butter
-		#or just the raw data?
+			#process_file() would have made this for our histograms
+			if 'graph_output_dir' in result and not os.path.exists(result['graph_output_dir']):
+				os.makedirs(result['graph_output_dir'])
 		else:
-			seconds = 0
-
-			twa_filt = twa_ds
-			tws_filt = tws_ds
-			bsp_filt = bsp_ds
-
-		#resample to give us regular data every second
-		twa_resample = twa_filt.resample('1s').mean()
-		tws_resample = tws_filt.resample('1s').mean()
-		bsp_resample = bsp_filt.resample('1s').mean()
-		
-		#the start/end of the data is sketchy from averaging, extrapolation... drop it
-		twa_final = twa_resample[seconds:-seconds]
-		tws_final = tws_resample[seconds:-seconds]
-		bsp_final = bsp_resample[seconds:-seconds]
-
-		#print("Raw Data")
-		#print(bsp_ds)
-		#print(bsp_ds.describe())
-		
-		#print("Filtered")
-		#print(bsp_filt)
-		#print(bsp_filt.describe())
-
-		#print("Resampled")
-		#print(bsp_final)
-		#print(bsp_final.describe())
-		
-		#okay, now bin all of our data
-		for time, bsp in bsp_final.items():
-			twa = twa_final.get(time)
-			tws = tws_final.get(time)
-
-			#print("[{}] TWA: {} TWS: {} BSP: {}".format(time, twa, tws, bsp))
-
-			#make sure we got all 3 values and they are valid
-			if twa and tws and not math.isnan(twa) and not math.isnan(tws) and not math.isnan(bsp):
-				bp.bin_speeds(twa, tws, bsp)
-
-		#
-		# Graphs below
-		#
-				
-		scatter_size = 1.0
-		line_size = 1.0
-		
-		#reset our graph.
-		#plt.figure()
-		fig, (twa_ax, tws_ax, bsp_ax) = plt.subplots(3)
-		fig.suptitle("{} ({} Points)".format(os.path.basename(myfile), len(tws_ds.index)))
-
-		#plot our data
-		tws_ds.plot(ax=tws_ax, c='#00bf00', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
-		#tws_rolling.plot(ax=tws_ax, c='orange', label='Rolling', linewidth=line_size)
-		#tws_butter.plot(ax=tws_ax, c='purple', label='Filtered', linewidth=line_size)
-		tws_final.plot(ax=tws_ax, c='black', label='Resampled', linewidth=line_size)
-
-		#show 0kts as base
-		tws_ax.set_ylim([0, None])
-		tws_ax.set(ylabel='TWS')
-		tws_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-		tws_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
-
-		#this is to format the x/y info in interactive mode
-		def format_tws(x, y):
-			formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
-			text = formatter.format_data(x)
-			return "{} TWS: {:.2f}".format(text, y)
-		tws_ax.format_coord = format_tws
-		
-		#plot our data
-		twa_ds.plot(ax=twa_ax, c='#bf0000', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
-		#twa_rolling.plot(ax=twa_ax, c='orange', label='Rolling', linewidth=line_size)
-		#twa_butter.plot(ax=twa_ax, c='purple', label='Filtered', linewidth=line_size)
-		twa_final.plot(ax=twa_ax, c='black', label='Resampled', linewidth=line_size)
-
-		#show 0kts as base
-		twa_ax.set_ylim([0, None])
-		twa_ax.set(ylabel='TWA')
-		twa_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-		twa_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
-
-		#this is to format the x/y info in interactive mode
-		def format_twa(x, y):
-			formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
-			text = formatter.format_data(x)
-			return "{} TWA: {}".format(text, round(y))
-		twa_ax.format_coord = format_twa
-
-		#plot our data
-		bsp_ds.plot(ax=bsp_ax, c='#0000bf', label='Raw', marker='.', markersize=scatter_size, linewidth=0, linestyle='None', markeredgewidth=0)
-		#bsp_rolling.plot(ax=bsp_ax, c='orange', label='Rolling', linewidth=line_size)
-		#bsp_butter.plot(ax=bsp_ax, c='purple', label='Filtered', linewidth=line_size)
-		bsp_final.plot(ax=bsp_ax, c='black', label='Resampled', linewidth=line_size)
-
-		#show 0kts as base
-		bsp_ax.set_ylim([0, None])
-		bsp_ax.set(ylabel='BSP')
-		bsp_ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-		bsp_ax.xaxis.set_minor_formatter(mdates.DateFormatter("%H:%M"))
-
-		#this is to format the x/y info in interactive mode
-		def format_bsp(x, y):
-			formatter = mdates.DateFormatter('%Y-%m-%d %H:%M:%S')
-			text = formatter.format_data(x)
-			return "{} BSP: {:.2f}".format(text, y)
-		bsp_ax.format_coord = format_bsp
-		
-		#auto format our date ticks.
-		plt.setp(tws_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
-		plt.setp(twa_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
-		plt.setp(bsp_ax.get_xticklabels(), rotation=0, horizontalalignment='center', fontsize=6)
+			result = next(results)
+			file_stats[myfile] = result['stats']
+
+			#okay, now bin all of our data
+			file_bp = boatpolar.BoatPolar(streaming=args.streaming)
+			if 'points' in result:
+				result['stats'].start('bin')
+				file_bp.bin_all_speeds(result['twa'], result['tws'], result['bsp'])
+				result['stats'].stop('bin')
+				result['stats'].count('binned_samples', len(result['bsp']))
+
+			#and save them for next time
+			if use_bins:
+				path = bins_path(args.cache_dir, myfile, args, use_sog)
+				try:
+					save_bins(path, myfile, signatures[myfile], file_bp, result)
+				except OSError as e:
+					print("Could not save bins {}: {}".format(path, e))
+
+		if 'points' not in result:
+			continue
 
-    	#give us a nicely spaced set of graphs
-		fig.tight_layout()    
+		#what was our max boat speed?
+		max_bsp = result['max_bsp']
 
-		#where to save it?
-		file_parts = os.path.split(myfile)
-		category = os.path.basename(file_parts[0])
-		graph_output_dir = "graphs/{}".format(category)
+		#each log's bins go in after the ones before it
+		bp.merge_bins(file_bp)
 
-		if not os.path.exists(graph_output_dir):
-			os.makedirs(graph_output_dir)
-			
-		#okay, actually save
-		graph_output_file = "{}/data-{}.png".format(graph_output_dir, file_parts[1])
-		plt.savefig(graph_output_file, bbox_inches='tight', dpi=600)
-		print("Writing data graph to {}. {} points".format(graph_output_file, len(twa_pd)))
+		category = result['category']
+		graph_output_dir = result['graph_output_dir']
 
 		#how many points on this config?
-		total_points += len(twa_pd)
-    
-		#do we want to show the interactive one?
-		if args.graph:
-			plt.show()
+		total_points += result['points']
 
-		#finally, clear our graph for the next one
-		plt.clf()
-		plt.close()
+	if pool is not None:
+		pool.close()
+		pool.join()
 
 	#cruncho el numero
 	if args.graph:
@@ -426,7 +588,15 @@ def main():
 	bp.aws_max = args.aws_max
 
 	#okay, do our generation
-	all_polars = bp.generate_polars(graph_output_dir, max_bsp)
+	total_stats.start('stats')
+	all_polars = bp.generate_polars(None, max_bsp)
+	total_stats.stop('stats')
+
+	#and a histogram of each bin
+	if graph_output_dir:
+		total_stats.start('plot')
+		bp.plot_histograms(graph_output_dir)
+		total_stats.stop('plot')
 	
 	#lets make a polar chart!
 	polar_graph_file = False
@@ -437,15 +607,34 @@ def main():
 		polar_graph_file = "graphs/{}/polar-chart-{}.png".format(category, os.path.basename(args.file))
 		title = "{} Polar Chart".format(os.path.basename(args.file))
 
+	total_stats.start('plot')
 	all_polars['mean'].polar_chart(args.graph, polar_graph_file, title)
+	total_stats.stop('plot')
 	
 	#write our files...
+	total_stats.start('write')
 	for idx, polar in all_polars.items():
 		fname = "polars/{}-{}.csv".format(polar_name, idx)
 		print("Writing results to {}".format(fname))
 		polar.write_csv(fname)
+	total_stats.stop('write')
 		
 	print("{} total data points processed.".format(total_points))
 
+	#how did it go?
+	if args.stats_json:
+		report = {'files': {}}
+		for myfile, stats in file_stats.items():
+			report['files'][myfile] = stats.to_dict()
+			total_stats.merge(stats)
+
+		report['total'] = total_stats.to_dict()
+		report['total']['seconds'] = round(time.perf_counter() - run_start, 6)
+		tracemalloc.stop()
+
+		with open(args.stats_json, 'w') as f:
+			json.dump(report, f, indent=2)
+		print("Writing stats to {}".format(args.stats_json))
+
 if __name__ == '__main__':
 	main()
@@ -22,6 +22,7 @@ import json
 import argparse
 import os
 import nmea0183
+import logfile
 from pprint import pprint
 
 def main():
@@ -31,6 +32,7 @@ def main():
 	parser.add_argument('-i', '--ip', action='store', default='192.168.50.20', help='IP Address of the NMEA0183 server')
 	parser.add_argument('-p', '--port', action='store', default='10110', help='Port of the NMEA0183 server')
 	parser.add_argument('-c', '--config', action='store', default='default', help='Sail configuration.  Can be any arbitrary text.  eg. "jib and main", "spinnaker", etc.')
+	parser.add_argument('-z', '--compress', default=False, action='store_true', help="Write a compressed .txt.gz log.  It is written in blocks so it can still be split up and searched quickly, and flushed to disk every few seconds so a crash or power cut only loses the last few seconds of data.")
     
 	args = parser.parse_args()
 
@@ -48,23 +50,31 @@ def main():
 		os.mkdir("data/{}".format(args.config))
 
 	#init our data
-	line = ''
+	reader = nmea0183.NMEAStreamReader()
 	nmea = nmea0183.nmea0183()
 
 	#start our log file
-	with open(fname, 'w') as f:
+	if args.compress:
+		fname = fname + '.gz'
+		logfp = logfile.BlockWriter(fname)
+	else:
+		logfp = open(fname, 'w')
+
+	with logfp as f:
 		try:
 			#log forever
 			while True:
 				
 				#get data from the receiver
-				line += s.recv(1)
+				chunk = s.recv(4096)
+				if not chunk:
+					break
 				
-				#did we get a new line?
-				if line[-2:] == '\r\n':
+				#did we get any new lines?
+				for line in reader.feed(chunk):
 					
 					#is it a valid nmea0183 line?
-					output = nmea.parseline(line)
+					output = nmea.parsebytes(line)
 					if nmea.valid:
 						
 						#write our line to our file...
@@ -72,19 +82,16 @@ def main():
 						jdata['time'] = datetime.datetime.now().isoformat()
 						jdata['unix_time'] = time.time()
 						jdata['timezone'] = str(tzlocal.get_localzone())
-						jdata['lines'] = [line[0:-2]]
+						jdata['lines'] = [nmea.line]
 						f.write(json.dumps(jdata) + "\n")
 						
 						#is it a known code?
-						if output.has_key('sog') and nmea.sentence == 'RMC':
-							print('[{}] SOG: {}'.format(nmea.sentence, output['sog']))
-						if output.has_key('water_speed') and nmea.sentence == 'VHW':
-							print('[{}] BSP: {}'.format(nmea.sentence, output['water_speed']))
-						if output.has_key('twa'):
-							print('[{}] TWA: {} TWS: {}'.format(nmea.sentence, output['twa'], output['tws']))
-					
-					#reset our buffer
-					line = ''
+						if nmea.sentence == 'RMC' and output.sog is not None:
+							print('[{}] SOG: {}'.format(nmea.sentence, output.sog))
+						if nmea.sentence == 'VHW' and output.water_speed is not None:
+							print('[{}] BSP: {}'.format(nmea.sentence, output.water_speed))
+						if nmea.sentence == 'MWV' and output.twa is not None:
+							print('[{}] TWA: {} TWS: {}'.format(nmea.sentence, output.twa, output.tws))
 				
 		except Exception as e:
 			pprint(e)
@@ -21,6 +21,7 @@ import tzlocal
 import json
 import argparse
 import os
+import logfile
 from pprint import pprint
 import websocket
 import math
@@ -35,6 +36,7 @@ def main():
 	parser.add_argument('-i', '--ip', action='store', default='192.168.50.20', help='IP Address of the NMEA0183 server')
 	parser.add_argument('-p', '--port', action='store', default='10110', help='Port of the NMEA0183 server')
 	parser.add_argument('-c', '--config', action='store', default='default', help='Sail configuration.  Can be any arbitrary text.  eg. "jib and main", "spinnaker", etc.')
+	parser.add_argument('-z', '--compress', default=False, action='store_true', help="Write a compressed .txt.gz log.  It is written in blocks so it can still be split up and searched quickly, and flushed to disk every few seconds so a crash or power cut only loses the last few seconds of data.")
     
 	args = parser.parse_args()
 	
@@ -92,7 +94,13 @@ def main():
 	"""
 	ws.send(request)
 
-	with open(fname, 'w') as f:
+	if args.compress:
+		fname = fname + '.gz'
+		logfp = logfile.BlockWriter(fname)
+	else:
+		logfp = open(fname, 'w')
+
+	with logfp as f:
 		try:
 			sog = 0
 			bsp = 0
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Log File
+Reading and writing our JSON lines log files, plain or compressed with gzip or xz.
+Logs written with BlockWriter are gzip files made of independent blocks, with a small index so we can jump into the middle of them.
+"""
+
+__author__ = "Zach Hoeken"
+__copyright__ = "Copyright 2022, Zach Hoeken"
+__credits__ = ["Zach Hoeken"]
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Zach Hoeken"
+__email__ = "hoeken@gmail.com"
+__status__ = "Beta"
+
+import os
+import mmap
+import gzip
+import lzma
+import zlib
+import time
+
+#compressed logs we can read, by file extension
+compressors = {
+	'.gz': gzip.open,
+	'.xz': lzma.open,
+}
+
+#what our log files are called
+LOG_EXTENSIONS = ('.txt', '.txt.gz', '.txt.xz')
+
+#how much log goes in each block of a BlockWriter file, before compression
+BLOCK_SIZE = 1024 * 1024
+
+#how often a BlockWriter pushes the block it's working on out to disk.  if the logger gets killed or loses power
+#we only lose this many seconds, everything before it can still be read back.  each flush costs a few bytes of compression.
+FLUSH_SECONDS = 5
+
+#is this one of our log files?
+def is_log(filename):
+	return filename.endswith(LOG_EXTENSIONS)
+
+#is this log compressed?
+def is_compressed(filename):
+	return os.path.splitext(filename)[1] in compressors
+
+#log filename without the .txt or .txt.gz on the end
+def log_name(filename):
+	for extension in sorted(LOG_EXTENSIONS, key=len, reverse=True):
+		if filename.endswith(extension):
+			return filename[0:-len(extension)]
+
+	return os.path.splitext(filename)[0]
+
+#open a log file, compressed or not.  mode is the same as open(), eg. 'rb' or 'wt'
+def open_log(filename, mode='rt'):
+	opener = compressors.get(os.path.splitext(filename)[1], open)
+	return opener(filename, mode)
+
+#where a BlockWriter keeps its index
+def blocks_path(filename):
+	return filename + '.blocks'
+
+#the (compressed offset, uncompressed offset) of every block in a log, or None if it wasn't written with a BlockWriter
+def load_blocks(filename):
+	try:
+		with open(blocks_path(filename)) as fp:
+			lines = fp.readlines()
+	except OSError:
+		return None
+
+	#the last block can be missing if the logger got killed at just the wrong time
+	size = os.path.getsize(filename)
+	blocks = []
+	for line in lines:
+		try:
+			compressed, uncompressed = [int(x) for x in line.split()]
+		except ValueError:
+			continue
+
+		if compressed < size:
+			blocks.append((compressed, uncompressed))
+
+	return blocks
+
+#yield the raw lines of a log between uncompressed byte offsets start and end, the whole thing by default.
+#plain logs get memory mapped, compressed ones start from the nearest block if they have them.
+def read_lines(filename, start=0, end=None):
+	opener = compressors.get(os.path.splitext(filename)[1])
+
+	with open(filename, 'rb') as fp:
+		if opener is None:
+			#mmap can't do empty files
+			if not os.fstat(fp.fileno()).st_size:
+				return
+			source = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+			source.seek(start)
+		else:
+			#jump to the last block that starts before us
+			skip = start
+			for compressed, uncompressed in load_blocks(filename) or []:
+				if uncompressed > start:
+					break
+				fp.seek(compressed)
+				skip = start - uncompressed
+
+			source = opener(fp)
+			source.seek(skip)
+
+		position = start
+		try:
+			while end is None or position < end:
+				line = source.readline()
+				if not line:
+					break
+
+				position += len(line)
+				yield line
+		#a log that is still being written, or got cut off, ends early
+		except EOFError:
+			pass
+		finally:
+			source.close()
+
+#writes a gzip log as a series of independent blocks, and remembers where each one starts in <log>.blocks
+#any gzip tool can still read the whole file, but we can also split it up or seek into it.
+#the current block gets sync flushed every flush_seconds, so a crash doesn't lose the whole thing.
+class BlockWriter:
+
+	def __init__(self, filename, block_size=BLOCK_SIZE, flush_seconds=FLUSH_SECONDS):
+		self.filename = filename
+		self.block_size = block_size
+		self.flush_seconds = flush_seconds
+		self.last_flush = time.monotonic()
+
+		self.fp = open(filename, 'wb')
+		self.index = open(blocks_path(filename), 'w')
+		self.block = None
+		self.block_start = 0
+		self.position = 0
+
+	#write some text, usually a whole line.  blocks only ever end on a line boundary.
+	def write(self, text):
+		data = text.encode('utf-8')
+
+		#start a new block?
+		if self.block is None:
+			self.block_start = self.position
+			self.index.write("{} {}\n".format(self.fp.tell(), self.position))
+			self.index.flush()
+			self.block = gzip.GzipFile(fileobj=self.fp, mode='wb', mtime=0)
+
+		self.block.write(data)
+		self.position += len(data)
+
+		#finish it off once it's big enough
+		if self.position - self.block_start >= self.block_size and data.endswith(b'\n'):
+			self.end_block()
+		#or at least get what we have onto the disk every so often
+		elif data.endswith(b'\n') and time.monotonic() - self.last_flush >= self.flush_seconds:
+			self.flush()
+
+	#sync flush the current block, everything written so far can be read back even if we never close()
+	def flush(self):
+		if self.block is not None:
+			self.block.flush(zlib.Z_SYNC_FLUSH)
+		self.fp.flush()
+		self.last_flush = time.monotonic()
+
+	def end_block(self):
+		if self.block is not None:
+			self.block.close()
+			self.block = None
+			self.fp.flush()
+			self.last_flush = time.monotonic()
+
+	def close(self):
+		self.end_block()
+		self.fp.close()
+		self.index.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
@@ -38,7 +38,7 @@ def main():
 	s.connect((args.ip, int(args.port)))
 
 	#init our data
-	line = ''
+	reader = nmea0183.NMEAStreamReader()
 	nmea = nmea0183.nmea0183()
 	
 	old_day = None
@@ -85,35 +85,36 @@ def main():
 	#log forever
 	while True:
 		#get data from the receiver
-		line += s.recv(1)
+		chunk = s.recv(4096)
+		if not chunk:
+			break
 		
-		#did we get a new line?
-		if line[-2:] == '\r\n':
+		#did we get any new lines?
+		for line in reader.feed(chunk):
 			#is it a valid nmea0183 line?
-			line = line.strip()
-			output = nmea.parseline(line)
+			output = nmea.parsebytes(line)
 			if nmea.valid:
 
 				#grab the appropriate data
 				try:
-					if output.has_key('log_trip') and output['log_trip']:
-						log = float(output['log_trip'])
-					if output.has_key('distance_to_destination') and output['distance_to_destination']:
-						dtw = round(float(output['distance_to_destination']), 1)
-					if output.has_key('sog') and nmea.sentence == 'RMC' and output['sog']:
-						sog = float(output['sog'])
+					if nmea.sentence == 'VLW' and output.log_trip:
+						log = output.log_trip
+					if nmea.sentence in ('RMB', 'BWC', 'BWR') and output.distance_to_destination:
+						dtw = round(output.distance_to_destination, 1)
+					if nmea.sentence == 'RMC' and output.sog:
+						sog = output.sog
 						minute_sog.append(sog)
 						tenmin_sog.append(sog)
 						hour_sog.append(sog)
 						day_sog.append(sog)
-					if output.has_key('water_speed') and nmea.sentence == 'VHW' and output['water_speed']:
-						bsp = float(output['water_speed'])
+					if nmea.sentence == 'VHW' and output.water_speed:
+						bsp = output.water_speed
 						minute_bsp.append(bsp)
 						tenmin_bsp.append(bsp)
 						hour_bsp.append(bsp)
 						day_bsp.append(bsp)
-					if output.has_key('tws') and output['tws']:
-						tws = float(output['tws'])
+					if nmea.sentence in ('MWV', 'MWD') and output.tws:
+						tws = output.tws
 						minute_tws.append(tws)
 						tenmin_tws.append(tws)
 						hour_tws.append(tws)
@@ -268,9 +269,6 @@ def main():
 			#else:
 			#	pprint(line)
 
-			#reset our buffer
-			line = ''
-
 	#clean up our socket
 	s.close()
 		
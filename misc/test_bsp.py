@@ -17,6 +17,7 @@ __status__ = "Beta"
 import json
 import numpy
 import nmea0183
+import logfile
 from pprint import pprint
 
 files = ["data/stargazer-spin+1st reef.txt", 'data/stargazer-bowsprit-spin.txt', 'data/stargazer-twin-bow-spin.txt', 'data/stargazer-screacher-and-full-main.txt']
@@ -26,7 +27,7 @@ files = ["data/stargazer-spin+1st reef.txt", 'data/stargazer-bowsprit-spin.txt',
 files = ['data/motorboating/nmea0183-log-motorboating-2022-01-12 1707.txt']
 
 for filename in files:
-	fp = open(filename)
+	fp = logfile.open_log(filename)
 
 	print(filename)
 	
@@ -52,9 +53,11 @@ for filename in files:
 				# run it through our parser
 				nmea = nmea0183.nmea0183()
 				output = nmea.parseline(line)	
+				if not nmea.valid:
+					continue
 
-				if output.has_key('sog') and nmea.sentence == 'RMC' and output['sog']:
-					sog = float(output['sog'])
+				if nmea.sentence == 'RMC' and output.sog is not None:
+					sog = output.sog
 					sogint = int(sog)
 					
 					if not sog_arr.has_key(sogint):
@@ -62,8 +65,8 @@ for filename in files:
 
 					sog_arr[sogint].append(sog)
 
-				if output.has_key('water_speed') and nmea.sentence == 'VHW' and output['water_speed']:
-					bsp = float(output['water_speed'])
+				if nmea.sentence == 'VHW' and output.water_speed is not None:
+					bsp = output.water_speed
 
 					if not bsp_arr.has_key(sogint):
 						bsp_arr[sogint] = []
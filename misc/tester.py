@@ -38,36 +38,34 @@ def main():
 	s.connect((args.ip, int(args.port)))
 
 	#init our data
-	line = ''
+	reader = nmea0183.NMEAStreamReader()
 	nmea = nmea0183.nmea0183()
 
 	#log forever
 	while True:
 		#get data from the receiver
-		line += s.recv(1)
+		chunk = s.recv(4096)
+		if not chunk:
+			break
 		
-		#did we get a new line?
-		if line[-2:] == '\r\n':
+		#did we get any new lines?
+		for line in reader.feed(chunk):
 			#is it a valid nmea0183 line?
-			line = line.strip()
-			output = nmea.parseline(line)
+			output = nmea.parsebytes(line)
 			if nmea.valid:
 				if nmea.sentence == 'VHW':
-					boat_speed = output['water_speed']
+					boat_speed = output.water_speed
 					print("Boat Speed: {}".format(boat_speed))
 				elif nmea.sentence == 'RMC':
-					sog = output['sog']
+					sog = output.sog
 					print("SOG: {}".format(sog))
 				#is it a known code?
 				elif not nmea.known:
-					print(line)
+					print(nmea.line)
 					pprint(nmea.params)
 			#else:
 			#	pprint(line)
 
-			#reset our buffer
-			line = ''
-
 	#clean up our socket
 	s.close()
 		
@@ -8,6 +8,7 @@ import json
 import argparse
 import os
 import nmea0183
+import logfile
 from pprint import pprint
 import pytz
 
@@ -24,13 +25,17 @@ def main():
 		for filename in files:
 			file_path = os.path.join(root, filename)
 
-			if filename.endswith('.txt'):
+			if logfile.is_log(filename):
 				print('file: %s' % (file_path))
 
-				fp = open(file_path)
+				fp = logfile.open_log(file_path)
 
-				tempfile = os.path.join(os.path.dirname(filename), str(uuid.uuid4()))
-				tmp_fp = open(tempfile, 'w')
+				#write it back the same way it came in, keeping the extension so it gets compressed the same
+				tempfile = os.path.join(os.path.dirname(filename), str(uuid.uuid4()) + os.path.splitext(filename)[1])
+				if logfile.load_blocks(file_path) is not None:
+					tmp_fp = logfile.BlockWriter(tempfile)
+				else:
+					tmp_fp = logfile.open_log(tempfile, 'wt')
 
 				while True:
 					#read lines until the end of file.
@@ -95,6 +100,8 @@ def main():
 				tmp_fp.close()
 
 				os.replace(tempfile, file_path)
+				if os.path.exists(logfile.blocks_path(tempfile)):
+					os.replace(logfile.blocks_path(tempfile), logfile.blocks_path(file_path))
 
 if __name__ == '__main__':
 	main()
@@ -17,629 +17,616 @@ __status__ = "Beta"
 from pprint import pprint
 import datetime
 import math
+import re
+import numpy
+import functools
+import operator
+import array
+from collections import namedtuple
+
+#
+# Records returned for each sentence we know how to parse.
+# They are immutable namedtuples with numbers already converted.  Empty numeric fields are None.
+#
+
+AAM = namedtuple('AAM', ['circle_entered', 'waypoint_perpendicular', 'circle_radius', 'waypoint_id'])
+ALM = namedtuple('ALM', ['messages', 'message_id', 'satellite_prn_number', 'gps_week_number', 'sv_health', 'eccentricity', 'almanac_reference_time', 'inclination_angle', 'rate_of_right_ascension', 'root_of_semi_major_axis', 'argument_of_perigee', 'longitude_of_ascension_node', 'mean_anomaly', 'f0_clock_parameter', 'f1_clock_parameter'])
+APA = namedtuple('APA', ['xte', 'circle_entered', 'waypoint_perpendicular', 'destination_bearing_true', 'destination_bearing_magnetic', 'waypoint_id'])
+APB = namedtuple('APB', ['xte', 'circle_entered', 'waypoint_perpendicular', 'destination_bearing_true', 'destination_bearing_magnetic', 'bearing_to_waypoint_true', 'bearing_to_waypoint_magnetic', 'heading_to_steer_true', 'heading_to_steer_magnetic', 'waypoint_id'])
+BEC = namedtuple('BEC', ['utc_time', 'waypoint_latitude', 'waypoint_longitude', 'bearing_to_waypoint_true', 'bearing_to_waypoint_magnetic', 'distance_to_waypoint', 'waypoint_id'])
+BOD = namedtuple('BOD', ['bearing_to_waypoint_true', 'bearing_to_waypoint_magnetic', 'to_waypoint_id', 'from_waypoint_id'])
+BWC = namedtuple('BWC', ['utc_time', 'waypoint_latitude', 'waypoint_longitude', 'bearing_to_waypoint_true', 'bearing_to_waypoint_magnetic', 'distance_to_destination', 'to_waypoint_id'])
+BWR = namedtuple('BWR', BWC._fields)
+BWW = namedtuple('BWW', ['bearing_degrees_true', 'bearing_degrees_magnetic', 'to_waypoint_id', 'from_waypoint_id'])
+DBK = namedtuple('DBK', ['keel_depth_feet', 'keel_depth_meters', 'keel_depth_fathoms'])
+DBS = namedtuple('DBS', ['surface_depth_feet', 'surface_depth_meters', 'surface_depth_fathoms'])
+DBT = namedtuple('DBT', ['transducer_depth_feet', 'transducer_depth_meters', 'transducer_depth_fathoms'])
+DPT = namedtuple('DPT', ['transducer_depth_meters', 'transducer_offset'])
+FSI = namedtuple('FSI', ['transmitting_frequency', 'receiving_frequency', 'communications_mode', 'power_level'])
+GGA = namedtuple('GGA', ['utc_time', 'latitude', 'longitude', 'gps_quality', 'gps_satellites', 'hdop', 'altitude'])
+GLC = namedtuple('GLC', ['gri_microseconds'])
+GLL = namedtuple('GLL', ['latitude', 'longitude', 'utc_time'])
+GSA = namedtuple('GSA', ['selection_mode', 'mode', 'satellites', 'pdop', 'hdop', 'vdop'])
+GSV = namedtuple('GSV', ['messages', 'message_id', 'satellites_in_view', 'satellites'])
+GSVSatellite = namedtuple('GSVSatellite', ['number', 'elevation', 'azimuth', 'snr'])
+GTD = namedtuple('GTD', ['time_difference'])
+HDG = namedtuple('HDG', ['heading_magnetic', 'heading_deviation', 'heading_variation'])
+HDM = namedtuple('HDM', ['heading_magnetic'])
+HDT = namedtuple('HDT', ['heading_true'])
+HSC = namedtuple('HSC', ['heading_true', 'heading_magnetic'])
+LCD = namedtuple('LCD', ['gri_microseconds', 'master_relative_snr', 'master_relative_ecd', 'time_difference'])
+LCDTimeDifference = namedtuple('LCDTimeDifference', ['microseconds', 'signal_status'])
+MSK = namedtuple('MSK', ['frequency_khz', 'frequency_selection', 'msk_bit_rate', 'bit_rate_selection', 'pop_status'])
+MTW = namedtuple('MTW', ['temperature'])
+MWV = namedtuple('MWV', ['awa', 'aws', 'twa', 'tws'])
+MWD = namedtuple('MWD', ['twd_true', 'twd_magnetic', 'tws'])
+OSD = namedtuple('OSD', ['heading_true', 'vessel_course', 'vessel_speed'])
+RMB = namedtuple('RMB', ['xte', 'to_waypoint_id', 'from_waypoint_id', 'destination_latitude', 'destination_longitude', 'distance_to_destination', 'bearing_to_destination', 'vmg_destination', 'arrival_status'])
+RMC = namedtuple('RMC', ['latitude', 'longitude', 'timestamp', 'sog'])
+RSD = namedtuple('RSD', ['cursor_range', 'cursor_bearing', 'range_scale', 'range_units'])
+TLL = namedtuple('TLL', ['target_number', 'latitude', 'longitude', 'target_name', 'utc_time'])
+TTM = namedtuple('TTM', ['target_number', 'target_distance', 'target_bearing', 'target_speed', 'target_course', 'cpa', 'tcpa', 'target_name', 'target_status', 'reference_target'])
+VHW = namedtuple('VHW', ['heading_magnetic', 'heading_true', 'water_speed'])
+VLW = namedtuple('VLW', ['log_total', 'log_water', 'log_trip'])
+VTG = namedtuple('VTG', ['cog_true', 'cog_magnetic', 'sog'])
+XDR = namedtuple('XDR', ['transducers'])
+XDRTransducer = namedtuple('XDRTransducer', ['type', 'data', 'units', 'name'])
+XTE = namedtuple('XTE', ['xte'])
+ZDA = namedtuple('ZDA', ['timestamp'])
+
+#what bytes.strip() takes off, for parsebytes()
+WHITESPACE_BYTES = frozenset(b' \t\n\r\x0b\x0c')
+
+#empty fields come through as None, everything else gets converted exactly once
+def to_float(value):
+	if value:
+		return float(value)
+	return None
+
+def to_int(value):
+	if value:
+		return int(value)
+	return None
+
+#read only list of the repeated groups in a sentence (satellites, transducers, etc), built straight off the
+#split fields.  entries only get converted when you iterate or index, so callers that ignore them pay nothing.
+#build(params, offset) makes one entry from the size fields starting at offset.  with skip_empty, groups whose
+#first field is empty are left out, like the unused satellite slots in GSA.
+#check is a group_pattern() for the groups.  it gets matched right away, so a garbled number makes the
+#sentence invalid while it is being parsed, and doesn't blow up later on whoever reads the groups.
+class LazyGroups:
+
+	def __init__(self, params, start, size, count, build, skip_empty=False, check=None):
+		self.params = params
+		self.build = build
+		self.skip_empty = skip_empty
+
+		#where each group starts.  the empty ones get dropped the first time anybody looks
+		self.offsets = range(start, start + count*size, size)
+
+		if check is not None and count and not check.fullmatch(',' + ','.join(params[start:start + count*size])):
+			raise ValueError('garbled number in {} groups'.format(params[0]))
+
+	def resolve(self):
+		if self.skip_empty:
+			self.offsets = [i for i in self.offsets if self.params[i] != '']
+			self.skip_empty = False
+
+		return self.offsets
+
+	def __len__(self):
+		return len(self.resolve())
+
+	def __getitem__(self, i):
+		offsets = self.resolve()
+		if isinstance(i, slice):
+			return [self.build(self.params, offset) for offset in offsets[i]]
+
+		return self.build(self.params, offsets[i])
+
+	def __iter__(self):
+		for offset in self.resolve():
+			yield self.build(self.params, offset)
+
+	def __eq__(self, other):
+		try:
+			return list(self) == list(other)
+		except TypeError:
+			return NotImplemented
+
+	def __repr__(self):
+		return repr(list(self))
+
+#regex that matches any number of comma separated groups of size fields, where the fields in numbers look
+#like something to_int() or to_float() can convert.  checking the text is a lot cheaper than converting it.
+INT_FIELD = r'(?:[+-]?\d+)?'
+FLOAT_FIELD = r'(?:[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)?'
+
+def group_pattern(size, numbers, number=FLOAT_FIELD):
+	fields = [number if i in numbers else r'[^,]*' for i in range(size)]
+	return re.compile('(?:,' + ','.join(fields) + ')*')
+
+GSA_GROUPS = group_pattern(1, (0,), INT_FIELD)
+GSV_GROUPS = group_pattern(4, (0, 1, 2, 3), INT_FIELD)
+LCD_GROUPS = group_pattern(2, (0,))
+XDR_GROUPS = group_pattern(4, (1,))
+
+#builders for the LazyGroups entries
+def build_gsa_satellite(params, i):
+	return int(params[i])
+
+def build_gsv_satellite(params, i):
+	return GSVSatellite(to_int(params[i]), to_int(params[i+1]), to_int(params[i+2]), to_int(params[i+3]))
+
+def build_lcd_time_difference(params, i):
+	return LCDTimeDifference(to_float(params[i]), params[i+1])
+
+def build_xdr_transducer(params, i):
+	return XDRTransducer(params[i], to_float(params[i+1]), params[i+2], params[i+3])
+
 
 class nmea0183:
 	
-	def __init__(self):
-		return
+	#wanted is an optional set of sentence ids, eg. {'MWV', 'VHW', 'RMC'}.  anything else gets
+	#rejected straight from the raw line, before we bother with the checksum or splitting fields.
+	#as_dict gives the old style dict output instead of records, with the None fields left out.
+	def __init__(self, wanted=None, as_dict=False):
+		self.wanted = wanted
+		self.as_dict = as_dict
+
+		#same thing for parsebytes()
+		self.wanted_bytes = None
+		if wanted is not None:
+			self.wanted_bytes = {sentence.encode('ascii') for sentence in wanted}
 	
 	def parseline(self, line):
 		
 		#clean up any whitespace
 		line = line.strip()
-		
-		#basic init
+		self.reset()
+		self.line = line
+
+		#do we even care about this one?  $TTSSS,... so the id is at a fixed spot
+		if self.wanted is not None and line[3:6] not in self.wanted:
+			self.talker = line[1:3]
+			self.sentence = line[3:6]
+			self.skipped = True
+			return self.finish(None)
+
+		#make sure it is a valid sentence first
+		output = None
+		if self.verifyline(line):
+			self.valid = True
+			output = self.parseparams(line[1:-3].split(','))
+
+		return self.finish(output)
+
+	#bytes version of parseline(), for data straight off a socket.  takes bytes, a bytearray or a memoryview slice
+	#and does the checksum and field split on the raw bytes without copying them.  normally the whole sentence
+	#gets decoded once and parsed, and nmea.line has the decoded text for logging.  if you pass a list of field
+	#numbers in fields, it only decodes those and returns them as a tuple of str, and nmea.line stays None.
+	#nmea.raw_params has all of the undecoded fields either way.
+	def parsebytes(self, data, fields=None):
+
+		#clean up any whitespace.  bytes.strip() hands back the same object when there's nothing to strip, like
+		#NMEAStreamReader lines, and a sentence is tiny anyway.  but a bytearray or memoryview could be a whole
+		#receive buffer, so find the ends by index and take a view instead of a copy.
+		if isinstance(data, bytes):
+			data = data.strip()
+		else:
+			start = 0
+			end = len(data)
+			while start < end and data[start] in WHITESPACE_BYTES:
+				start += 1
+			while end > start and data[end-1] in WHITESPACE_BYTES:
+				end -= 1
+			data = memoryview(data)[start:end]
+
+		self.reset()
+		self.raw_params = []
+
+		#do we even care about this one?
+		if self.wanted_bytes is not None and bytes(data[3:6]) not in self.wanted_bytes:
+			self.skipped = True
+			return self.finish(None)
+
+		#make sure it is a valid sentence first
+		if not self.verifybytes(data):
+			return self.finish(None)
+
+		try:
+			#only decode what we were asked for
+			if fields is not None:
+				self.raw_params = bytes(data[1:-3]).split(b',')
+				self.code = self.raw_params[0].decode('ascii')
+				self.talker = self.code[0:2]
+				self.sentence = self.code[2:]
+				self.valid = True
+
+				return tuple(self.raw_params[i].decode('ascii') for i in fields)
+
+			#the whole thing, in which case one decode is cheaper than one per field
+			self.line = str(data, 'ascii')
+			params = self.line[1:-3].split(',')
+		except (UnicodeDecodeError, IndexError):
+			self.line = None
+			self.valid = False
+			return self.finish(None)
+
+		self.valid = True
+		return self.finish(self.parseparams(params))
+
+	#basic init before each sentence
+	def reset(self):
+		self.line = None
 		self.code = None
 		self.talker = None
 		self.sentence = None
 		self.params = {}
+		self.valid = False
 		self.known = True
-		output = {}
+		self.skipped = False
+
+	#pull out our message identifiers and run the sentence parser on a split, verified sentence
+	def parseparams(self, params):
+		self.code = params[0]
+		self.talker = self.code[0:2]
+		self.sentence = self.code[2:]
+		self.params = params
+
+		#look up our handler, unknown sentences are a single dict miss
+		parser = self.parsers.get(self.sentence)
+		if parser is None:
+			self.known = False
+			return None
+
+		try:
+			output = parser(self, params)
+		except AttributeError as e:
+			#print ("Unknown code {}".format(self.code))
+			#pprint(params)
+			self.known = False
+			return None
+		except (ValueError, IndexError):
+			#garbled numbers or missing fields, treat it like a bad checksum
+			self.valid = False
+		else:
+			if self.valid:
+				return output
 
-		#make sure it is a valid sentence first
-		self.valid = False
-		if self.verifyline(line):
-			self.valid = True
+		#nobody should see a sentence name without a record to go with it
+		self.sentence = None
+		return None
+
+	#skipped sentences are neither valid nor known, and dict fans get a dict
+	def finish(self, output):
+		if self.skipped:
+			self.known = False
 
-			#pull out our message identifiers
-			params = line[1:-3].split(',')
-			self.code = params[0]
-			self.talker = self.code[0:2]
-			self.sentence = self.code[2:]
-			self.params = params
-			output = {}
-
-			try:
-				#AAM Waypoint Arrival Alarm
-				if self.sentence == 'AAM':
-					output = self.parse_AAM(params)
-				#APB Autopilot Sentence "B"
-				elif self.sentence == 'APB':
-					output = self.parse_APB(params)
-				#ALM GPS Almanac Data
-				elif self.sentence == 'ALM':
-					output = self.parse_ALM(params)
-				#APA Autopilot Sentence "A"
-				elif self.sentence == 'APA':
-					output = self.parse_APA(params)
-				#APB Autopilot Sentence "B"
-				elif self.sentence == 'APB':
-					output = self.parse_APB(params)
-				#BEC Bearing & Distance to Waypoint - Dead Reckoning
-				elif self.sentence == 'BEC':
-					output = self.parse_BEC(params)
-				#BOD Bearing - Waypoint to Waypoint
-				elif self.sentence == 'BOD':
-					output = self.parse_BOD(params)
-				#BWC Bearing and Distance to Waypoint - Latitude, N/S, Longitude, E/W, UTC, Status
-				elif self.sentence == 'BWC':
-					output = self.parse_BWC(params)
-				#BWR Bearing and Distance to Waypoint - Rhumb Line Latitude, N/S, Longitude, E/W, UTC, Status
-				elif self.sentence == 'BWR':
-					output = self.parse_BWR(params)
-				#BWW Bearing - Waypoint to Waypoint
-				elif self.sentence == 'BWW':
-					output = self.parse_BWW(params)
-				#DBK Depth Below Keel
-				elif self.sentence == 'DBK':
-					output = self.parse_DBK(params)
-				#DBS Depth Below Surface
-				elif self.sentence == 'DBS':
-					output = self.parse_DBS(params)
-				#DBT Depth Below Transducer
-				elif self.sentence == 'DBT':
-					output = self.parse_DBT(params)
-				#DPT Heading - Deviation & Variation
-				elif self.sentence == 'DPT':
-					output = self.parse_DPT(params)
-				#FSI Frequency Set Information
-				elif self.sentence == 'FSI':
-					output = self.parse_FSI(params)
-				#GGA Global Positioning System Fix Data. Time, Position and fix related data for a GPS receiver
-				elif self.sentence == 'GGA':
-					output = self.parse_GGA(params)
-				#GLC Geographic Position, Loran-C
-				elif self.sentence == 'GLC':
-					output = self.parse_GLC(params)				
-				#GLL Geographic Position - Latitude/Longitude
-				elif self.sentence == 'GLL':
-					output = self.parse_GLL(params)
-				#GSA GPS DOP and active satellites
-				elif self.sentence == 'GSA':
-					output = self.parse_GSA(params)
-				#GSV Satellites in view
-				elif self.sentence == 'GSV':
-					output = self.parse_GSV(params)
-				#GTD Geographic Location in Time Differences
-				elif self.sentence == 'GTD':
-					output = self.parse_GTD(params)
-				#HDG Heading - Deviation & Variation
-				elif self.sentence == 'HDG':
-					output = self.parse_HDG(params)
-				#HDM Heading - Magnetic
-				elif self.sentence == 'HDM':
-					output = self.parse_HDM(params)
-				#HDT Heading - True
-				elif self.sentence == 'HDT':
-					output = self.parse_HDT(params)
-				#HSC Heading Steering Command
-				elif self.sentence == 'HSC':
-					output = self.parse_HSC(params)
-				#LCD Loran-C Signal Data
-				elif self.sentence == 'LCD':
-					output = self.parse_LCD(params)
-				#MSK MSK Receiver Interface (for DGPS Beacon Receivers)
-				elif self.sentence == 'MSK':
-					output = self.parse_MSK(params)
-				#MTW Water Temperature
-				elif self.sentence == 'MTW':
-					output = self.parse_MTW(params)
-				#MWV Wind Speed and Angle
-				elif self.sentence == 'MWV':
-					output = self.parse_MWV(params)
-				#MWD Wind Direction & Speed
-				elif self.sentence == 'MWD':
-					output = self.parse_MWD(params)	
-				#OSD Own Ship Data
-				elif self.sentence == 'OSD':
-					output = self.parse_OSD(params)
-				#ROO Waypoints in Active Route
-				elif self.sentence == 'ROO':
-					output = self.parse_ROO(params)
-				#RMA Recommended Minimum Navigation Information
-				elif self.sentence == 'RMA':
-					output = self.parse_RMA(params)
-				#RMB Recommended Minimum Navigation Information
-				elif self.sentence == 'RMB':
-					output = self.parse_RMB(params)
-				#RMC Recommended Minimum Navigation Information
-				elif self.sentence == 'RMC':
-					output = self.parse_RMC(params)
-				#ROT Rate Of Turn
-				elif self.sentence == 'ROT':
-					output = self.parse_ROT(params)
-				#RPM Revolutions
-				elif self.sentence == 'RPM':
-					output = self.parse_RPM(params)
-				#RSA Rudder Sensor Angle
-				elif self.sentence == 'RSA':
-					output = self.parse_RSA(params)
-				#RSD RADAR System Data
-				elif self.sentence == 'RSD':
-					output = self.parse_RSD(params)
-				#RTE Routes
-				elif self.sentence == 'RTE':
-					output = self.parse_RTE(params)
-				#SFI Scanning Frequency Information
-				elif self.sentence == 'SFI':
-					output = self.parse_SFI(params)
-				#STN Multiple Data ID
-				elif self.sentence == 'STN':
-					output = self.parse_STN(params)
-				#TLL Target Latitude and Longitude
-				elif self.sentence == 'TLL':
-					output = self.parse_TLL(params)
-				#TTM Tracked Target Message
-				elif self.sentence == 'TTM':
-					output = self.parse_TTM(params)
-				#VBW Dual Ground/Water Speed
-				elif self.sentence == 'VBW':
-					output = self.parse_VBW(params)
-				#VDR Set and Drift
-				elif self.sentence == 'VDR':
-					output = self.parse_VDR(params)
-				#VHW Water Speed and Heading
-				elif self.sentence == 'VHW':
-					output = self.parse_VHW(params)
-				#VLW Distance Traveled through Water
-				elif self.sentence == 'VLW':
-					output = self.parse_VLW(params)
-				#VPW Speed - Measured Parallel to Wind
-				elif self.sentence == 'VPW':
-					output = self.parse_VPW(params)
-				#VTG Track Made Good and Ground Speed
-				elif self.sentence == 'VTG':
-					output = self.parse_VTG(params)
-				#VWR Relative Wind Speed and Angle
-				elif self.sentence == 'VWR':
-					output = self.parse_VWR(params)
-				#WCV Waypoint Closure Velocity
-				elif self.sentence == 'WCV':
-					output = self.parse_WCV(params)
-				#WNC Distance - Waypoint to Waypoint
-				elif self.sentence == 'WNC':
-					output = self.parse_WNC(params)
-				#WPL Waypoint Location
-				elif self.sentence == 'WPL':
-					output = self.parse_WPL(params)
-				#XDR Cross Track Error - Dead Reckoning
-				elif self.sentence == 'XDR':
-					output = self.parse_XDR(params)
-				#XTE Cross-Track Error - Measured
-				elif self.sentence == 'XTE':
-					output = self.parse_XTE(params)
-				#XTR Cross Track Error - Dead Reckoning
-				elif self.sentence == 'XTR':
-					output = self.parse_XTR(params)
-				#ZDA Time & Date - UTC, Day, Month, Year and Local Time Zone
-				elif self.sentence == 'ZDA':
-					output = self.parse_ZDA(params)
-				#ZFO UTC & Time from Origin Waypoint
-				elif self.sentence == 'ZFO':
-					output = self.parse_ZFO(params)
-				#ZTG UTC & Time to Destination Waypoint
-				elif self.sentence == 'ZTG':
-					output = self.parse_ZTG(params)
-				else:
-					self.known = False
-			except AttributeError as e:
-				#print ("Unknown code {}".format(self.code))
-				#pprint(params)
-				self.known = False
-				output = {}
+		if self.as_dict:
+			return self.to_dict(output)
 
 		return output
-	
-	#AAM Waypoint Arrival Alarm
-	def parse_AAM(self, params, output = {}):
-		if params[1] == 'A':
-			output['circle_entered'] = True
-		else:
-			output['circle_entered'] = False
 
-		if params[2] == 'A':
-			output['waypoint_perpendicular'] = True
-		else:
-			output['waypoint_perpendicular'] = False
+	#turn a record into an old style dict, leaving out the None fields
+	def to_dict(self, record):
+		if record is None:
+			return {}
+		if not hasattr(record, '_asdict'):
+			return record
+
+		output = {}
+		for key, value in record._asdict().items():
+			if value is None:
+				continue
+			if isinstance(value, (list, LazyGroups)):
+				value = [item._asdict() if hasattr(item, '_asdict') else item for item in value]
+			output[key] = value
 
-		output['circle_radius'] = params[3]
-		output['waypoint_id'] = params[5]
-		
 		return output
 	
+	#AAM Waypoint Arrival Alarm
+	def parse_AAM(self, params):
+		return AAM(
+			circle_entered = (params[1] == 'A'),
+			waypoint_perpendicular = (params[2] == 'A'),
+			circle_radius = to_float(params[3]),
+			waypoint_id = params[5]
+		)
+	
 	#ALM GPS Almanac Data
-	def parse_ALM(self, params, output = {}):
-		output['messages'] = params[1]
-		output['message_id'] = params[2]
-		output['satellite_prn_number'] = params[3]
-		output['gps_week_number'] = params[4]
-		output['sv_health'] = params[5]
-		output['eccentricity'] = params[6]
-		output['almanac_reference_time'] = params[7]
-		output['inclination_angle'] = params[8]
-		output['rate_of_right_ascension'] = params[9]
-		output['root_of_semi_major_axis'] = params[10]
-		output['argument_of_perigee'] = params[11]
-		output['longitude_of_ascension_node'] = params[12]
-		output['mean_anomaly'] = params[13]
-		output['f0_clock_parameter'] = params[14]
-		output['f1_clock_parameter'] = params[15]
-
-		return output		
+	def parse_ALM(self, params):
+		#the orbital parameters are all hex, so leave them be
+		return ALM(
+			messages = to_int(params[1]),
+			message_id = to_int(params[2]),
+			satellite_prn_number = to_int(params[3]),
+			gps_week_number = to_int(params[4]),
+			sv_health = params[5],
+			eccentricity = params[6],
+			almanac_reference_time = params[7],
+			inclination_angle = params[8],
+			rate_of_right_ascension = params[9],
+			root_of_semi_major_axis = params[10],
+			argument_of_perigee = params[11],
+			longitude_of_ascension_node = params[12],
+			mean_anomaly = params[13],
+			f0_clock_parameter = params[14],
+			f1_clock_parameter = params[15]
+		)
 	
 	#APA Autopilot Sentence "A"
-	def parse_APA(self, params, output = {}):
-		output['xte'] = float(params[3])
+	def parse_APA(self, params):
+		xte = float(params[3])
 		if params[4] == 'L':
-			output['xte'] = -output['xte']
-		
-		if params[6] == 'A':
-			output['circle_entered'] = True
-		else:
-			output['circle_entered'] = False
-
-		if params[7] == 'A':
-			output['waypoint_perpendicular'] = True
-		else:
-			output['waypoint_perpendicular'] = False
-		
-		if params[9] == 'T':
-			output['destination_bearing_true'] = params[8]
-		else:
-			output['destination_bearing_magnetic'] = params[8]
-			
-		output['waypoint_id'] = params[10]
+			xte = -xte
 		
-		return output
+		bearing = to_float(params[8])
+
+		return APA(
+			xte = xte,
+			circle_entered = (params[6] == 'A'),
+			waypoint_perpendicular = (params[7] == 'A'),
+			destination_bearing_true = bearing if params[9] == 'T' else None,
+			destination_bearing_magnetic = bearing if params[9] != 'T' else None,
+			waypoint_id = params[10]
+		)
 			
 	#APB Autopilot Sentence "B"
-	def parse_APB(self, params, output = {}):
-		output['xte'] = float(params[3])
+	def parse_APB(self, params):
+		xte = float(params[3])
 		if params[4] == 'L':
-			output['xte'] = -output['xte']
-		
-		if params[6] == 'A':
-			output['circle_entered'] = True
-		else:
-			output['circle_entered'] = False
-
-		if params[7] == 'A':
-			output['waypoint_perpendicular'] = True
-		else:
-			output['waypoint_perpendicular'] = False
-		
-		if params[9] == 'T':
-			output['destination_bearing_true'] = params[8]
-		else:
-			output['destination_bearing_magnetic'] = params[8]
-			
-		if params[12] == 'T':
-			output['bearing_to_waypoint_true'] = params[11]
-		else:
-			output['bearing_to_waypoint_magnetic'] = params[11]
-			
-		if params[14] == 'T': 
-			output['heading_to_steer_true'] = params[13]
-		else:
-			output['heading_to_steer_magnetic'] = params[13]
-
-		output['waypoint_id'] = params[10]
+			xte = -xte
 		
-		return output
+		destination_bearing = to_float(params[8])
+		waypoint_bearing = to_float(params[11])
+		heading_to_steer = to_float(params[13])
+
+		return APB(
+			xte = xte,
+			circle_entered = (params[6] == 'A'),
+			waypoint_perpendicular = (params[7] == 'A'),
+			destination_bearing_true = destination_bearing if params[9] == 'T' else None,
+			destination_bearing_magnetic = destination_bearing if params[9] != 'T' else None,
+			bearing_to_waypoint_true = waypoint_bearing if params[12] == 'T' else None,
+			bearing_to_waypoint_magnetic = waypoint_bearing if params[12] != 'T' else None,
+			heading_to_steer_true = heading_to_steer if params[14] == 'T' else None,
+			heading_to_steer_magnetic = heading_to_steer if params[14] != 'T' else None,
+			waypoint_id = params[10]
+		)
 
 	#BEC Bearing & Distance to Waypoint - Dead Reckoning
-	def parse_BEC(self, params, output = {}):
-		output['utc_time'] = params[1]
-		output['waypoint_latitude'] = self.parse_latitude(params[2], params[3])
-		output['waypoint_longitude'] = self.parse_longitude(params[4], params[5])
-		output['bearing_to_waypoint_true'] = params[6]
-		output['bearing_to_waypoint_magnetic'] = params[8]
-		output['distance_to_waypoint'] = params[10]
-		output['waypoint_id'] = params[12]
-		
-		return output
+	def parse_BEC(self, params):
+		return BEC(
+			utc_time = params[1],
+			waypoint_latitude = self.parse_latitude(params[2], params[3]),
+			waypoint_longitude = self.parse_longitude(params[4], params[5]),
+			bearing_to_waypoint_true = to_float(params[6]),
+			bearing_to_waypoint_magnetic = to_float(params[8]),
+			distance_to_waypoint = to_float(params[10]),
+			waypoint_id = params[12]
+		)
 	
 	
 	#BOD Bearing - Waypoint to Waypoint
-	def parse_BOD(self, params, output = {}):
-		output['bearing_to_waypoint_true'] = params[1]
-		output['bearing_to_waypoint_magnetic'] = params[3]
-		output['to_waypoint_id'] = params[5]
-		output['from_waypoint_id'] = params[6]
-		
-		return output
+	def parse_BOD(self, params):
+		return BOD(
+			bearing_to_waypoint_true = to_float(params[1]),
+			bearing_to_waypoint_magnetic = to_float(params[3]),
+			to_waypoint_id = params[5],
+			from_waypoint_id = params[6]
+		)
 
 	#BWC Bearing and Distance to Waypoint - Latitude, N/S, Longitude, E/W, UTC, Status
-	def parse_BWC(self, params, output = {}):
-		output['utc_time'] = params[1]
-		output['waypoint_latitude'] = self.parse_latitude(params[2], params[3])
-		output['waypoint_longitude'] = self.parse_longitude(params[4], params[5])
-		output['bearing_to_waypoint_true'] = params[6]
-		output['bearing_to_waypoint_magnetic'] = params[8]
-		output['distance_to_destination'] = params[10]
-		output['to_waypoint_id'] = params[12]
-		
-		return output
+	def parse_BWC(self, params):
+		return BWC(
+			utc_time = params[1],
+			waypoint_latitude = self.parse_latitude(params[2], params[3]),
+			waypoint_longitude = self.parse_longitude(params[4], params[5]),
+			bearing_to_waypoint_true = to_float(params[6]),
+			bearing_to_waypoint_magnetic = to_float(params[8]),
+			distance_to_destination = to_float(params[10]),
+			to_waypoint_id = params[12]
+		)
 	
 	#BWR Bearing and Distance to Waypoint - Rhumb Line Latitude, N/S, Longitude, E/W, UTC, Status
-	def parse_BWR(self, params, output = {}):
-		output['utc_time'] = params[1]
-		output['waypoint_latitude'] = self.parse_latitude(params[2], params[3])
-		output['waypoint_longitude'] = self.parse_longitude(params[4], params[5])
-		output['bearing_to_waypoint_true'] = params[6]
-		output['bearing_to_waypoint_magnetic'] = params[8]
-		output['distance_to_destination'] = params[10]
-		output['to_waypoint_id'] = params[12]
-		
-		return output
+	def parse_BWR(self, params):
+		return BWR(*self.parse_BWC(params))
 	
 	#BWW Bearing - Waypoint to Waypoint
-	def parse_BWW(self, params, output = {}):
-		output['bearing_degrees_true'] = params[1]
-		output['bearing_degrees_magnetic'] = params[3]
-		output['to_waypoint_id'] = params[5]
-		output['from_waypoint_id'] = params[6]
-
-		return output
+	def parse_BWW(self, params):
+		return BWW(
+			bearing_degrees_true = to_float(params[1]),
+			bearing_degrees_magnetic = to_float(params[3]),
+			to_waypoint_id = params[5],
+			from_waypoint_id = params[6]
+		)
 	
 	#DBK Depth Below Keel
-	def parse_DBK(self, params, output = {}):
-		output['keel_depth_feet'] = params[1]
-		output['keel_depth_meters'] = params[3]
-		output['keel_depth_fathoms'] = params[5]
-
-		return output
+	def parse_DBK(self, params):
+		return DBK(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 
 	#DBS Depth Below Surface
-	def parse_DBS(self, params, output = {}):
-		output['surface_depth_feet'] = params[1]
-		output['surface_depth_meters'] = params[3]
-		output['surface_depth_fathoms'] = params[5]
-
-		return output
+	def parse_DBS(self, params):
+		return DBS(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 	
 	#DBT Depth Below Transducer
-	def parse_DBT(self, params, output = {}):
+	def parse_DBT(self, params):
 		if params[1] != '':
-			output['transducer_depth_feet'] = params[1]
-			output['transducer_depth_meters'] = params[3]
-			output['transducer_depth_fathoms'] = params[5]
+			return DBT(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 		else:
 			self.valid = False
-
-		return output
 	
 	#DPT Depth Transducer
-	def parse_DPT(self, params, output = {}):
-		output['transducer_depth_meters'] = params[1]
-		output['transducer_offset'] = params[2]
-
-		return output
+	def parse_DPT(self, params):
+		return DPT(to_float(params[1]), to_float(params[2]))
 	
 	#FSI Frequency Set Information
-	def parse_FSI(self, params, output = {}):
-		output['transmitting_frequency'] = params[1]
-		output['receiving_frequency'] = params[2]
-		output['communications_mode'] = params[3]
-		output['power_level'] = params[4]
-
-		return output
+	def parse_FSI(self, params):
+		return FSI(
+			transmitting_frequency = to_int(params[1]),
+			receiving_frequency = to_int(params[2]),
+			communications_mode = params[3],
+			power_level = to_int(params[4])
+		)
 	
 	#GGA Global Positioning System Fix Data. Time, Position and fix related data
-	def parse_GGA(self, params, output = {}):
-		output['utc_time'] = params[1]
-		output['latitude'] = self.parse_latitude(params[2], params[3])
-		output['longitude'] = self.parse_longitude(params[4], params[5])
-		output['gps_quality'] = params[6]
-		output['gps_satellites'] = params[7]
-		output['hdop'] = params[8]
-		output['altitude'] = params[9]
-
-		return output
+	def parse_GGA(self, params):
+		return GGA(
+			utc_time = params[1],
+			latitude = self.parse_latitude(params[2], params[3]),
+			longitude = self.parse_longitude(params[4], params[5]),
+			gps_quality = to_int(params[6]),
+			gps_satellites = to_int(params[7]),
+			hdop = to_float(params[8]),
+			altitude = to_float(params[9])
+		)
 
 	#GLC Geographic Position, Loran-C
-	def parse_GLC(self, params, output = {}):
-		output['gri_microseconds'] = params[1]
-
-		return output
+	def parse_GLC(self, params):
+		return GLC(to_float(params[1]))
 
 	#GLL Geographic Position - Latitude/Longitude
-	def parse_GLL(self, params, output = {}):
+	def parse_GLL(self, params):
 		if params[6] == 'A':
-			output['latitude'] = self.parse_latitude(params[1], params[2])
-			output['longitude'] = self.parse_longitude(params[3], params[4])
-			output['utc_time'] = params[5]
+			return GLL(
+				latitude = self.parse_latitude(params[1], params[2]),
+				longitude = self.parse_longitude(params[3], params[4]),
+				utc_time = params[5]
+			)
 		else:
 			self.valid = False
-
-		return output
 	
 	#GSA GPS DOP and active satellites
-	def parse_GSA(self, params, output = {}):
-		output['selection_mode'] = params[1]
-		output['mode'] = params[2]
-		output['satellites'] = []
-		for i in range(12):
-			if params[3+i] != '':
-				output['satellites'].append(params[3+i])
-		output['pdop'] = params[15]
-		output['hdop'] = params[16]
-		output['vdop'] = params[17]
-
-		return output
+	def parse_GSA(self, params):
+		return GSA(
+			selection_mode = params[1],
+			mode = to_int(params[2]),
+			satellites = LazyGroups(params, 3, 1, 12, build_gsa_satellite, skip_empty=True, check=GSA_GROUPS),
+			pdop = to_float(params[15]),
+			hdop = to_float(params[16]),
+			vdop = to_float(params[17])
+		)
 	
 	#GSV Satellites in view
-	def parse_GSV(self, params, output = {}):
-		output['messages'] = params[1]
-		output['message_id'] = params[2]
-		output['satellites_in_view'] = params[3]
-		
-		output['satellites'] = []
+	def parse_GSV(self, params):
 		total = int(math.floor((len(params) - 4) / 4))
-		for i in range(total):
-			sat = {}
-			sat['number'] = params[4+i*4]
-			sat['elevation'] = params[5+i*4]
-			sat['azimuth'] = params[6+i*4]
-			sat['snr'] = params[7+i*4]
-			output['satellites'].append(sat)
-
-		return output	
+
+		return GSV(
+			messages = to_int(params[1]),
+			message_id = to_int(params[2]),
+			satellites_in_view = to_int(params[3]),
+			satellites = LazyGroups(params, 4, 4, total, build_gsv_satellite, check=GSV_GROUPS)
+		)
 	
 	#GTD Geographic Location in Time Differences
-	def parse_GTD(self, params, output = {}):
-		output['time_difference'] = []
+	def parse_GTD(self, params):
+		time_difference = []
 		for i in range(5):
-			output['time_difference'].append(params[i])
+			time_difference.append(to_float(params[1+i]))
 		
-		return output
+		return GTD(time_difference)
 
 	#HDG Heading - Deviation & Variation
-	def parse_HDG(self, params, output = {}):
-		output['heading_magnetic'] = params[1]
-
+	def parse_HDG(self, params):
 		if params[2]:
-			output['heading_deviation'] = float(params[2])
+			deviation = float(params[2])
 			if params[3] == 'W':
-				output['heading_deviation'] = -output['heading_deviation']
+				deviation = -deviation
 		else:
-			output['heading_deviation'] = 0
+			deviation = 0.0
 
 		if params[4]:
-			output['heading_variation'] = float(params[4])
+			variation = float(params[4])
 			if params[5] == 'W':
-				output['heading_variation'] = -output['heading_variation']
+				variation = -variation
 		else:
-			output['heading_variation'] = 0
+			variation = 0.0
 
-		return output
+		return HDG(to_float(params[1]), deviation, variation)
 
 	#HDM Heading - Magnetic
-	def parse_HDM(self, params, output = {}):
-		output['heading_magnetic'] = params[1]
-		
-		return output
+	def parse_HDM(self, params):
+		return HDM(to_float(params[1]))
 	
 	#HDT Heading - True
-	def parse_HDT(self, params, output = {}):
-		output['heading_true'] = params[1]
-		
-		return output
+	def parse_HDT(self, params):
+		return HDT(to_float(params[1]))
 
 	#HSC Heading Steering Command
-	def parse_HSC(self, params, output = {}):
-		output['heading_true'] = params[1]
-		output['heading_magnetic'] = params[3]
-		
-		return output
+	def parse_HSC(self, params):
+		return HSC(to_float(params[1]), to_float(params[3]))
 	
 	#LCD Loran-C Signal Data
-	def parse_LCD(self, params, output = {}):
-		output['gri_microseconds'] = params[1]
-		output['master_relative_snr'] = params[2]
-		output['master_relative_ecd'] = params[3]
-		output['time_difference'] = []
-		for i in range(0, 5):
-			diff = {}
-			diff['microseconds'] = params[4+i*2]
-			diff['signal_status'] = params[5+i*2]
-			output['time_difference'].append(diff)
-		
-		return output
+	def parse_LCD(self, params):
+		#five pairs of time differences, make sure they are all there
+		if len(params) < 14:
+			raise IndexError('LCD is missing time differences')
+
+		return LCD(
+			gri_microseconds = to_float(params[1]),
+			master_relative_snr = to_float(params[2]),
+			master_relative_ecd = to_float(params[3]),
+			time_difference = LazyGroups(params, 4, 2, 5, build_lcd_time_difference, check=LCD_GROUPS)
+		)
 
 	#MSK MSK Receiver Interface (for DGPS Beacon Receivers)
-	def parse_MSK(self, params, output = {}):
-		output['frequency_khz'] = params[1]
-		output['frequency_selection'] = params[2]
-		output['msk_bit_rate'] = params[3]
-		output['bit_rate_selection'] = params[4]
-		output['pop_status'] = params[5]
-		
-		return output
+	def parse_MSK(self, params):
+		return MSK(
+			frequency_khz = to_float(params[1]),
+			frequency_selection = params[2],
+			msk_bit_rate = to_float(params[3]),
+			bit_rate_selection = params[4],
+			pop_status = to_float(params[5])
+		)
 
 	#MTW Water Temperature
-	def parse_MTW(self, params, output = {}):
-		output['temperature'] = params[1]
-		return output
+	def parse_MTW(self, params):
+		return MTW(to_float(params[1]))
 
 	#MWV Wind Speed and Angle
-	def parse_MWV(self, params, output = {}):
-		output = {}
-
+	def parse_MWV(self, params):
 		angle = float(params[1])
 		if angle > 180:
 			angle = 360 - angle
 		if params[2] == 'R':
-			output['awa'] = angle
-			output['aws'] = float(params[3])
+			return MWV(awa = angle, aws = float(params[3]), twa = None, tws = None)
 		elif params[2] == 'T':
-			output['twa'] = angle
-			output['tws'] = float(params[3])
-
-		return output
+			return MWV(awa = None, aws = None, twa = angle, tws = float(params[3]))
+		else:
+			return MWV(None, None, None, None)
 
 	#MWD Wind Direction & Speed
-	def parse_MWD(self, params, output = {}):
-		output['twd_true'] = params[1]
-		output['twd_magnetic'] = params[3]
-		output['tws'] = params[5]
-
-		return output
+	def parse_MWD(self, params):
+		return MWD(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 
 	#OSD Own Ship Data
-	def parse_OSD(self, params, output = {}):
-		output['heading_true'] = params[1]
-		output['vessel_course'] = params[3]
-		output['vessel_speed'] = params[5]
-
-		return output
+	def parse_OSD(self, params):
+		return OSD(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 	
 	#ROO Waypoints in Active Route
-		wpts = []
-		for i in range(len(params) - 1):
-			wpts.append(params[i+i])
-		output['waypoints'] = wpts
-
-		return output
-	
 	#RMA Recommended Minimum Navigation Information
 	
-	
 	#RMB Recommended Minimum Navigation Information
-	def parse_RMB(self, params, output = {}):
-		output['xte'] = float(params[2])
+	def parse_RMB(self, params):
+		xte = float(params[2])
 		if params[4] == 'L':
-			output['xte'] = -output['xte']
+			xte = -xte
 		
-		output['to_waypoint_id'] = params[4]
-		output['from_waypoint_id'] = params[5]
-
-		output['destination_latitude'] = self.parse_latitude(params[6], params[7])
-		output['destination_longitude'] = self.parse_longitude(params[8], params[9])
-
-		output['distance_to_destination'] = params[10]
-		output['bearing_to_destination'] = params[11]
-		output['vmg_destination'] = params[12]
-		
-		output['arrival_status'] = (params[13] == 'A')
-
-		return output
+		return RMB(
+			xte = xte,
+			to_waypoint_id = params[4],
+			from_waypoint_id = params[5],
+			destination_latitude = self.parse_latitude(params[6], params[7]),
+			destination_longitude = self.parse_longitude(params[8], params[9]),
+			distance_to_destination = to_float(params[10]),
+			bearing_to_destination = to_float(params[11]),
+			vmg_destination = to_float(params[12]),
+			arrival_status = (params[13] == 'A')
+		)
 
 	#RMC Recommended Minimum Navigation Information
-	def parse_RMC(self, params, output = {}):
-
-		output['latitude'] = self.parse_latitude(params[3], params[4])
-		output['longitude'] = self.parse_longitude(params[5], params[6])
+	def parse_RMC(self, params):
 
 		#parse our date
 		mydate = params[9]
@@ -655,86 +642,74 @@ class nmea0183:
 
 		#make our timestamp
 		dt = datetime.datetime(myyear, mymonth, myday, myhours, myminutes, myseconds)
-		output['timestamp'] = dt.isoformat()
 
-		#these are totally just guesses
-		output['sog'] = params[7]
-		
-		return output
+		return RMC(
+			latitude = self.parse_latitude(params[3], params[4]),
+			longitude = self.parse_longitude(params[5], params[6]),
+			timestamp = dt.isoformat(),
+			#these are totally just guesses
+			sog = to_float(params[7])
+		)
 
 	#ROT Rate Of Turn
 	#RPM Revolutions
 	#RSA Rudder Sensor Angle
 
 	#RSD RADAR System Data
-	def parse_RSD(self, params, output = {}):
-		output['cursor_range'] = params[9]
-		output['cursor_bearing'] = params[10]
-		output['range_scale'] = params[11]
-		output['range_units'] = params[12]
-		
-		return output
+	def parse_RSD(self, params):
+		return RSD(to_float(params[9]), to_float(params[10]), to_float(params[11]), params[12])
 	
 	#RTE Routes
 	#SFI Scanning Frequency Information
 	#STN Multiple Data ID
 
 	#TLL Target Latitude and Longitude
-	def parse_TLL(self, params, output = {}):
-		output['target_number'] = params[1]
-		output['latitude'] = self.parse_latitude(params[2], params[3])
-		output['longitude'] = self.parse_longitude(params[4], params[5])
-		output['target_name'] = params[6]
-		output['utc_time'] = params[7]
-		
-		return output
+	def parse_TLL(self, params):
+		return TLL(
+			target_number = to_int(params[1]),
+			latitude = self.parse_latitude(params[2], params[3]),
+			longitude = self.parse_longitude(params[4], params[5]),
+			target_name = params[6],
+			utc_time = params[7]
+		)
 	
 	#TTM Tracked Target Message
-	def parse_TTM(self, params, output = {}):
-		output['target_number'] = params[1]
-		output['target_distance'] = params[2]
-		output['target_bearing'] = params[3]
-		output['target_speed'] = params[5]
-		output['target_course'] = params[6]
-		output['cpa'] = params[8]
-		output['tcpa'] = params[9]
-		output['target_name'] = params[11]
-		output['target_status'] = params[12]
-		output['reference_target'] = params[13]
-		
-		return output
+	def parse_TTM(self, params):
+		return TTM(
+			target_number = to_int(params[1]),
+			target_distance = to_float(params[2]),
+			target_bearing = to_float(params[3]),
+			target_speed = to_float(params[5]),
+			target_course = to_float(params[6]),
+			cpa = to_float(params[8]),
+			tcpa = to_float(params[9]),
+			target_name = params[11],
+			target_status = params[12],
+			reference_target = params[13]
+		)
 	
 	#VBW Dual Ground/Water Speed
 	#VDR Set and Drift
 	
 	#VHW Water Speed and Heading
-	def parse_VHW(self, params, output = {}):
-		output['heading_magnetic'] = params[1]
-		output['heading_true'] = params[3]
-		output['water_speed'] = params[5]
-		
-		return output
+	def parse_VHW(self, params):
+		return VHW(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 	
 	#VLW Distance Traveled through Water
-	def parse_VLW(self, params, output = {}):
-		output['log_total'] = params[1]
-		output['log_water'] = params[3]
-
+	def parse_VLW(self, params):
 		#seems B&G adding extra params...
 		if len(params) >= 6:
-			output['log_trip'] = params[5]
+			log_trip = to_float(params[5])
+		else:
+			log_trip = None
 		
-		return output
+		return VLW(to_float(params[1]), to_float(params[3]), log_trip)
 	
 	#VPW Speed - Measured Parallel to Wind
 	
 	#VTG Track Made Good and Ground Speed
-	def parse_VTG(self, params, output = {}):
-		output['cog_true'] = params[1]
-		output['cog_magnetic'] = params[3]
-		output['sog'] = params[5]
-
-		return output	
+	def parse_VTG(self, params):
+		return VTG(to_float(params[1]), to_float(params[3]), to_float(params[5]))
 		
 	#VWR Relative Wind Speed and Angle
 	#WCV Waypoint Closure Velocity
@@ -742,33 +717,24 @@ class nmea0183:
 	#WPL Waypoint Location
 	
 	#XDR Cross Track Error - Dead Reckoning
-	def parse_XDR(self, params, output = {}):
-		output['transducers'] = []
-
-		devices = int(math.floor(len(params) / 4))
-		for i in range(devices):
-			transducer = {}
-			transducer['type'] = params[1+i*4]
-			transducer['data'] = params[2+i*4]
-			transducer['units'] = params[3+i*4]
-			transducer['name'] = params[4+i*4]
-
-			output['transducers'].append(transducer)
+	def parse_XDR(self, params):
+		#only complete groups of type, data, units, name
+		devices = int(math.floor((len(params) - 1) / 4))
 		
-		return output
+		return XDR(LazyGroups(params, 1, 4, devices, build_xdr_transducer, check=XDR_GROUPS))
 
 	#XTE Cross-Track Error - Measured
-	def parse_XTE(self, params, output = {}):
-		output['xte'] = float(params[3])
+	def parse_XTE(self, params):
+		xte = float(params[3])
 		if params[4] == 'L':
-			output['xte'] = -output['xte']
+			xte = -xte
 		
-		return output
+		return XTE(xte)
 
 	#XTR Cross Track Error - Dead Reckoning
 
 	#ZDA Time & Date - UTC, Day, Month, Year and Local Time Zone
-	def parse_ZDA(self, params, output = {}):
+	def parse_ZDA(self, params):
 		#parse our date
 		myday = int(params[2])
 		mymonth = int(params[3])
@@ -782,13 +748,108 @@ class nmea0183:
 
 		#make our timestamp
 		dt = datetime.datetime(myyear, mymonth, myday, myhours, myminutes, myseconds)
-		output['timestamp'] = dt.isoformat()
-		
-		return output
+
+		return ZDA(dt.isoformat())
 		
 	#ZFO UTC & Time from Origin Waypoint
 	#ZTG UTC & Time to Destination Waypoint
 
+	#sentence id -> parse function, built once at import.  see register_parser() for adding more.
+	parsers = {
+		#AAM Waypoint Arrival Alarm
+		'AAM': parse_AAM,
+		#APB Autopilot Sentence "B"
+		'APB': parse_APB,
+		#ALM GPS Almanac Data
+		'ALM': parse_ALM,
+		#APA Autopilot Sentence "A"
+		'APA': parse_APA,
+		#BEC Bearing & Distance to Waypoint - Dead Reckoning
+		'BEC': parse_BEC,
+		#BOD Bearing - Waypoint to Waypoint
+		'BOD': parse_BOD,
+		#BWC Bearing and Distance to Waypoint - Latitude, N/S, Longitude, E/W, UTC, Status
+		'BWC': parse_BWC,
+		#BWR Bearing and Distance to Waypoint - Rhumb Line Latitude, N/S, Longitude, E/W, UTC, Status
+		'BWR': parse_BWR,
+		#BWW Bearing - Waypoint to Waypoint
+		'BWW': parse_BWW,
+		#DBK Depth Below Keel
+		'DBK': parse_DBK,
+		#DBS Depth Below Surface
+		'DBS': parse_DBS,
+		#DBT Depth Below Transducer
+		'DBT': parse_DBT,
+		#DPT Heading - Deviation & Variation
+		'DPT': parse_DPT,
+		#FSI Frequency Set Information
+		'FSI': parse_FSI,
+		#GGA Global Positioning System Fix Data. Time, Position and fix related data for a GPS receiver
+		'GGA': parse_GGA,
+		#GLC Geographic Position, Loran-C
+		'GLC': parse_GLC,
+		#GLL Geographic Position - Latitude/Longitude
+		'GLL': parse_GLL,
+		#GSA GPS DOP and active satellites
+		'GSA': parse_GSA,
+		#GSV Satellites in view
+		'GSV': parse_GSV,
+		#GTD Geographic Location in Time Differences
+		'GTD': parse_GTD,
+		#HDG Heading - Deviation & Variation
+		'HDG': parse_HDG,
+		#HDM Heading - Magnetic
+		'HDM': parse_HDM,
+		#HDT Heading - True
+		'HDT': parse_HDT,
+		#HSC Heading Steering Command
+		'HSC': parse_HSC,
+		#LCD Loran-C Signal Data
+		'LCD': parse_LCD,
+		#MSK MSK Receiver Interface (for DGPS Beacon Receivers)
+		'MSK': parse_MSK,
+		#MTW Water Temperature
+		'MTW': parse_MTW,
+		#MWV Wind Speed and Angle
+		'MWV': parse_MWV,
+		#MWD Wind Direction & Speed
+		'MWD': parse_MWD,
+		#OSD Own Ship Data
+		'OSD': parse_OSD,
+		#RMB Recommended Minimum Navigation Information
+		'RMB': parse_RMB,
+		#RMC Recommended Minimum Navigation Information
+		'RMC': parse_RMC,
+		#RSD RADAR System Data
+		'RSD': parse_RSD,
+		#TLL Target Latitude and Longitude
+		'TLL': parse_TLL,
+		#TTM Tracked Target Message
+		'TTM': parse_TTM,
+		#VHW Water Speed and Heading
+		'VHW': parse_VHW,
+		#VLW Distance Traveled through Water
+		'VLW': parse_VLW,
+		#VTG Track Made Good and Ground Speed
+		'VTG': parse_VTG,
+		#XDR Cross Track Error - Dead Reckoning
+		'XDR': parse_XDR,
+		#XTE Cross-Track Error - Measured
+		'XTE': parse_XTE,
+		#ZDA Time & Date - UTC, Day, Month, Year and Local Time Zone
+		'ZDA': parse_ZDA,
+	}
+
+	#subclasses get their own copy of the table, with any parse_XXX methods they define swapped in,
+	#so overriding a parser or adding a new sentence works just like it did with getattr() dispatch
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+
+		cls.parsers = dict(cls.parsers)
+		for name, parser in vars(cls).items():
+			if is_parser_name(name):
+				cls.parsers[name[6:]] = parser
+
 	def parse_latitude(self, latitude, northsouth):
 		if latitude:
 			lat = float(latitude) / 100.0
@@ -833,4 +894,190 @@ class nmea0183:
 			
 			return target_checksum == checksum_hex
 		else:
-			return False
\ No newline at end of file
+			return False
+
+	#bytes version of verifyline(), data should already be stripped
+	def verifybytes(self, data):
+
+		#has to start with a $ and have a checksum
+		if len(data) < 4 or data[0] != 0x24 or data[-3] != 0x2A:
+			return False
+
+		#checksum is the hexadecimal value of an XOR of all chars between $ and *
+		checksum = functools.reduce(operator.xor, data[1:-3], 0)
+
+		return data[-2:] == b'%02X' % checksum
+
+	#batch version of verifyline() that checks a whole block of lines at once with numpy.
+	#lines get stripped like parseline() does.  returns a boolean mask, one entry per line.
+	def verifylines(self, lines):
+		lines = [line.strip() for line in lines]
+		mask = numpy.zeros(len(lines), dtype=bool)
+		if not len(lines):
+			return mask
+
+		#pack all our lines into one big buffer.  non-ascii chars become '?' so offsets line up, but those lines fail anyway
+		lengths = numpy.fromiter((len(line) for line in lines), dtype=numpy.int64, count=len(lines))
+		ascii = numpy.fromiter((line.isascii() for line in lines), dtype=bool, count=len(lines))
+		buf = numpy.frombuffer(''.join(lines).encode('ascii', 'replace'), dtype=numpy.uint8)
+		starts = numpy.cumsum(lengths) - lengths
+
+		#smallest possible sentence is $*XX
+		ok = ascii & (lengths >= 4)
+		ok_idx = numpy.flatnonzero(ok)
+		starts = starts[ok]
+		stars = starts + lengths[ok] - 3
+
+		#has to start with a $ and have a checksum
+		framed = (buf[starts] == ord('$')) & (buf[stars] == ord('*'))
+
+		#running xor over the whole buffer, so the xor of the chars between $ and * is just two lookups
+		running = numpy.bitwise_xor.accumulate(buf)
+		checksum = running[stars - 1] ^ running[starts]
+
+		#parse our hex suffix, uppercase only just like verifyline()
+		hex_values = numpy.full(256, -1, dtype=numpy.int16)
+		for i, char in enumerate(b'0123456789ABCDEF'):
+			hex_values[char] = i
+		high = hex_values[buf[stars + 1]]
+		low = hex_values[buf[stars + 2]]
+
+		mask[ok_idx] = framed & (high >= 0) & (low >= 0) & (high * 16 + low == checksum)
+
+		return mask
+
+
+#turns a stream of bytes in chunks of any size (eg. from a socket) into complete sentences.
+#sentences start at a $ and end at a CR, LF or the next $.  anything else between them gets dropped.
+class NMEAStreamReader:
+
+	#sentences are supposed to be 82 chars max, anything way longer than that is junk
+	def __init__(self, max_length=1024):
+		self.max_length = max_length
+		self.buffer = b''
+
+	#add a chunk of data, returns a list of the complete sentences as bytes, without line endings
+	def feed(self, chunk):
+		data = self.buffer + bytes(chunk)
+
+		#either line ending will do, and whatever is after the last one is a partial line
+		lines = data.replace(b'\r', b'\n').split(b'\n')
+		rest = lines.pop()
+
+		sentences = []
+		for line in lines:
+			self.split(line, sentences)
+
+		#anything after the last $ of our partial line might still be coming, save it for next time
+		start = rest.rfind(b'$')
+		if start == -1:
+			self.buffer = b''
+		else:
+			self.split(rest[0:start], sentences)
+			self.buffer = rest[start:]
+
+			if len(self.buffer) > self.max_length:
+				self.buffer = b''
+
+		return sentences
+
+	#end of the stream, returns whatever partial sentence we had left as a list
+	def flush(self):
+		sentences = []
+		self.split(self.buffer, sentences)
+		self.buffer = b''
+
+		return sentences
+
+	#pull the $ framed sentences out of a single line
+	def split(self, line, sentences):
+		for sentence in line.split(b'$')[1:]:
+			sentence = sentence.strip()
+			if sentence:
+				sentences.append(b'$' + sentence)
+
+#channel name -> (sentence id, record field) for decode_columns().  add to it for more channels.
+columns = {
+	'twa': ('MWV', 'twa'),
+	'tws': ('MWV', 'tws'),
+	'awa': ('MWV', 'awa'),
+	'aws': ('MWV', 'aws'),
+	'water_speed': ('VHW', 'water_speed'),
+	'sog': ('RMC', 'sog'),
+	'cog': ('VTG', 'cog_true'),
+	'heading_magnetic': ('HDG', 'heading_magnetic'),
+	'depth': ('DPT', 'transducer_depth_meters'),
+	'water_temperature': ('MTW', 'temperature'),
+	'log_trip': ('VLW', 'log_trip'),
+}
+
+#decode a block of raw lines straight to one float64 numpy array per channel, skipping the per sentence output.
+#returns (values, index), both dicts keyed by channel.  index[channel] holds the position in lines that
+#each value came from, so you can line them up with your timestamps.  pass a counts dict to get tallies of what went wrong.
+def decode_columns(lines, channels=('twa', 'tws', 'water_speed', 'sog'), counts=None):
+
+	#which fields do we need from which sentences?
+	fields = {}
+	for channel in channels:
+		sentence, field = columns[channel]
+		fields.setdefault(sentence, []).append((channel, field))
+
+	values = {channel: array.array('d') for channel in channels}
+	index = {channel: array.array('q') for channel in channels}
+
+	#only look at the sentences we need, then check all of their checksums in one go
+	nmea = nmea0183(wanted=set(fields))
+	picked = []
+	picked_lines = []
+	unknown = 0
+	for i, line in enumerate(lines):
+		line = line.strip()
+		sentence = line[3:6]
+		if sentence in fields:
+			picked.append(i)
+			picked_lines.append(line)
+		elif sentence not in nmea0183.parsers:
+			unknown += 1
+	verified = nmea.verifylines(picked_lines)
+
+	failed = 0
+	for i, line, ok in zip(picked, picked_lines, verified):
+		if not ok:
+			continue
+
+		nmea.reset()
+		nmea.valid = True
+		record = nmea.parseparams(line[1:-3].split(','))
+		if record is None:
+			failed += 1
+			continue
+
+		for channel, field in fields[nmea.sentence]:
+			value = getattr(record, field)
+			if value is not None:
+				values[channel].append(value)
+				index[channel].append(i)
+
+	for channel in channels:
+		values[channel] = numpy.frombuffer(values[channel], dtype=numpy.float64)
+		index[channel] = numpy.frombuffer(index[channel], dtype=numpy.int64)
+
+	#how did it go?  checksums and parsing are only checked on the sentences we needed.
+	if counts is not None:
+		for name, count in (('sentences', len(lines)), ('unknown_sentences', unknown), ('needed_sentences', len(picked)), ('checksum_failures', len(picked) - int(verified.sum())), ('parse_failures', failed)):
+			counts[name] = counts.get(name, 0) + count
+
+	return values, index
+
+#parse_XXX, where XXX is a sentence id
+def is_parser_name(name):
+	return len(name) == 9 and name.startswith('parse_') and name[6:].isupper()
+
+#register a parse function for an extra sentence id, eg. register_parser('XYZ', parse_XYZ)
+#it gets called as parser(nmea, params) and replaces any existing parser for that id, in cls and its subclasses.
+#a subclass that defines its own parse_XYZ method keeps using that one.
+def register_parser(sentence, parser, cls=nmea0183):
+	cls.parsers[sentence] = parser
+	for subclass in cls.__subclasses__():
+		if 'parse_' + sentence not in vars(subclass):
+			register_parser(sentence, parser, subclass)
@@ -0,0 +1,716 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""PolarLog
+Reads our JSON lines log files (NMEA0183 or Signal K) and turns them into time series of TWA, TWS and BSP.
+"""
+
+__author__ = "Zach Hoeken"
+__copyright__ = "Copyright 2022, Zach Hoeken"
+__credits__ = ["Zach Hoeken"]
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Zach Hoeken"
+__email__ = "hoeken@gmail.com"
+__status__ = "Beta"
+
+import os
+import mmap
+import json
+import hashlib
+import bisect
+import time
+import tracemalloc
+import multiprocessing
+import datetime
+import math
+import nmea0183
+import logfile
+
+import pandas as pd
+import numpy as np
+
+from dateutil import tz
+
+#timezones we have already looked up, by name
+timezones = {}
+
+def get_timezone(name):
+	if name not in timezones:
+		timezones[name] = tz.gettz(name)
+
+	return timezones[name]
+
+#timestamp for a logged nmea line, either (unix_time, timezone) or the human readable time
+def nmea_time(line_time):
+	if isinstance(line_time, tuple):
+		#just use the unix timestamp - fast, but we lose timezone info.
+		local_tz = get_timezone(line_time[1])
+		pd_time = datetime.datetime.utcfromtimestamp(line_time[0])
+		return pd_time.replace(tzinfo=local_tz)
+	else:
+		#convert the human timestamp - needed if you want to edit the data
+		return pd.to_datetime(line_time)
+
+#the nanoseconds since 1970 behind a datetime index.  pandas 2 and up can keep times in s/ms/us instead, so convert first.
+def ns_times(index):
+	if hasattr(index, 'as_unit'):
+		index = index.as_unit('ns')
+
+	return index.asi8
+
+#nmea_time() for a whole array of unix timestamps in one timezone at once.
+#just like the logger, these are UTC wall clock times labelled with the local timezone.
+def unix_index(unix_times, timezone):
+	#round to the microsecond exactly like datetime.utcfromtimestamp() does
+	seconds = np.floor(unix_times)
+	micros = np.round((unix_times - seconds) * 1e6)
+	wall = pd.DatetimeIndex((seconds.astype('int64') * 1000000 + micros.astype('int64')) * 1000)
+
+	local_tz = get_timezone(timezone)
+	if local_tz is None:
+		return wall
+
+	index = wall.tz_localize(local_tz, ambiguous='NaT', nonexistent='NaT')
+
+	#times right around a daylight savings change are rare, let dateutil sort those out one at a time
+	missing = np.flatnonzero(index.isna())
+	if len(missing):
+		fixed = pd.DatetimeIndex([nmea_time((unix_times[i], timezone)) for i in missing])
+		utc = ns_times(index).copy()
+		utc[missing] = ns_times(fixed)
+		index = pd.DatetimeIndex(utc).tz_localize('UTC').tz_convert(local_tz)
+
+	return index
+
+#pd.to_datetime() on a whole array of timestamp strings at once.
+#pandas 2 wants them all in exactly the same format, but isoformat() leaves the fraction off when it's zero,
+#so fall back to ISO8601 parsing and then one at a time like we used to.
+def parse_times(texts):
+	try:
+		return pd.to_datetime(texts)
+	except ValueError:
+		pass
+
+	try:
+		return pd.to_datetime(texts, format='ISO8601')
+	except ValueError:
+		return pd.Index([pd.to_datetime(text) for text in texts])
+
+#timestamps for the nmea lines at rows, built all at once.  unix_times is NaN and zones is None for lines logged without unix_time.
+def nmea_index(rows, unix_times, zones, text_times):
+	if not len(rows):
+		return pd.Index([])
+
+	row_times = unix_times[rows]
+	row_zones = set(zones[rows])
+
+	#the usual case, everything has a unix time in the same timezone
+	if len(row_zones) == 1 and not np.isnan(row_times).any():
+		return unix_index(row_times, row_zones.pop())
+
+	#older logs only have the human readable time
+	if np.isnan(row_times).all():
+		return pd.Index(parse_times(text_times[rows]))
+
+	#a mix, do it the slow way
+	line_times = []
+	for i in rows:
+		if np.isnan(unix_times[i]):
+			line_times.append(text_times[i])
+		else:
+			line_times.append((unix_times[i], zones[i]))
+
+	return pd.Index([nmea_time(line_time) for line_time in line_times])
+
+#convert signal k's SI units to ours
+def signalk_knots(value):
+	return round(value * 1.94384, 1)
+
+def signalk_degrees(value):
+	return round(math.degrees(value))
+
+#the signal k paths we care about, and which channel and conversion they go to
+signalk_paths = {
+	'environment.wind.angleTrueWater': ('twa', signalk_degrees),
+	'environment.wind.speedTrue': ('tws', signalk_knots),
+	'navigation.speedThroughWater': ('water_speed', signalk_knots),
+	'navigation.speedOverGround': ('sog', signalk_knots),
+}
+
+#signal k update timestamps, all at once
+def signalk_index(times):
+	if not len(times):
+		return []
+
+	return parse_times(times)
+
+#signal k times come first in a file that somehow has both
+def add_times(times, index):
+	if len(times):
+		return list(times) + list(index)
+
+	return index
+
+#counts of what we read, plus wall time and peak memory for each stage, for generate-polars.py --stats-json.
+#memory is only measured while tracemalloc is running.  a stage that runs more than once keeps its worst peak.
+#peak_bytes is the most memory we had in use during any stage, not just what that stage needed.
+#stats from worker processes can be merged in.  a stage's seconds is how long it was running in any of them,
+#and worker_seconds adds up the time from every process, so it's more than seconds when they overlap.
+class LogStats:
+
+	def __init__(self):
+		self.counts = {}
+		self.stages = {}
+		self.running = {}
+		self.peak_bytes = None
+
+	def count(self, name, count=1):
+		self.counts[name] = self.counts.get(name, 0) + count
+
+	#time.time() and not perf_counter(), so times from different processes line up
+	def start(self, stage):
+		memory = None
+		if tracemalloc.is_tracing():
+			tracemalloc.reset_peak()
+			memory = tracemalloc.get_traced_memory()[0]
+
+		self.running[stage] = (time.time(), memory)
+
+	def stop(self, stage):
+		started, memory = self.running.pop(stage)
+
+		peak = None
+		if memory is not None:
+			traced_peak = tracemalloc.get_traced_memory()[1]
+			peak = traced_peak - memory
+			self.peak_bytes = max(self.peak_bytes or 0, traced_peak)
+
+		stopped = time.time()
+		self.add_stage(stage, [(started, stopped)], stopped - started, peak)
+
+	def add_stage(self, stage, spans, worker_seconds, peak):
+		result = self.stages.setdefault(stage, {'spans': [], 'worker_seconds': 0.0, 'peak_bytes': None})
+		result['spans'].extend(spans)
+		result['worker_seconds'] += worker_seconds
+		if peak is not None:
+			result['peak_bytes'] = max(result['peak_bytes'] or 0, peak)
+
+	#add in the stats from another file, or another piece of this one
+	def merge(self, other):
+		for name, count in other.counts.items():
+			self.count(name, count)
+		for stage, result in other.stages.items():
+			self.add_stage(stage, result['spans'], result['worker_seconds'], result['peak_bytes'])
+		if other.peak_bytes is not None:
+			self.peak_bytes = max(self.peak_bytes or 0, other.peak_bytes)
+
+	#wall time covered by a list of (start, stop) spans, counting overlaps once
+	@staticmethod
+	def wall_seconds(spans):
+		seconds = 0.0
+		end = None
+		for started, stopped in sorted(spans):
+			if end is None or started > end:
+				seconds += stopped - started
+				end = stopped
+			elif stopped > end:
+				seconds += stopped - end
+				end = stopped
+
+		return seconds
+
+	def to_dict(self):
+		stages = {}
+		for stage, result in self.stages.items():
+			stages[stage] = {
+				'seconds': round(self.wall_seconds(result['spans']), 6),
+				'worker_seconds': round(result['worker_seconds'], 6),
+				'peak_bytes': result['peak_bytes']
+			}
+
+		return {'counts': dict(self.counts), 'stages': stages, 'peak_bytes': self.peak_bytes}
+
+#bump this whenever the decoding changes so old caches get thrown away
+CACHE_VERSION = 2
+
+#don't bother splitting a log into pieces smaller than this for parallel decoding
+MIN_CHUNK_SIZE = 16 * 1024 * 1024
+
+#the seek index remembers where every this many seconds of log starts
+INDEX_VERSION = 1
+INDEX_INTERVAL = 60
+
+#read a whole log file, returns a dict of 'twa', 'tws' and 'bsp' pandas series.  any of them can be empty.
+#use_sog takes boat speed from SOG instead of speed through the water.
+#with a cache_dir we keep the decoded channels on disk and skip parsing next time, as long as the log hasn't changed.
+#jobs > 1 splits a big log into pieces and decodes them in parallel.
+#window is a (start, end) pair of datetimes to only read part of the log, see line_time().  either end can be None.
+#pass a LogStats to find out how it went.
+def read_log(filename, use_sog=False, cache_dir=None, jobs=1, window=None, stats=None):
+	#the cache is for whole files, a window is quick to read anyway
+	if cache_dir is None or window is not None:
+		return decode_log(filename, use_sog, jobs, window, stats)
+
+	if stats is None:
+		stats = LogStats()
+
+	path = cache_path(cache_dir, filename, use_sog)
+	signature = file_signature(filename)
+
+	stats.start('cache')
+	channels = load_cache(path, signature)
+	stats.stop('cache')
+
+	if channels is None:
+		stats.count('cache_misses')
+		channels = decode_log(filename, use_sog, jobs, None, stats)
+
+		stats.start('cache')
+		try:
+			save_cache(path, signature, channels)
+		except OSError as e:
+			print("Could not write cache {}: {}".format(path, e))
+		stats.stop('cache')
+	else:
+		stats.count('cache_hits')
+
+	return channels
+
+#actually parse a log file, see read_log()
+def decode_log(filename, use_sog=False, jobs=1, window=None, stats=None):
+	#only look at the part of the file our window could be in
+	if window is not None:
+		start, end = seek_window(filename, window)
+	else:
+		start, end = 0, None
+
+	ranges = split_log(filename, jobs, start, end)
+	if len(ranges) < 2:
+		return decode_range(filename, use_sog, start, end, window, stats)
+
+	#each piece gets its own worker, and they come back in file order
+	with multiprocessing.Pool(len(ranges)) as pool:
+		pieces = pool.starmap(decode_piece, [(filename, use_sog, start, end, window) for start, end in ranges])
+
+	#our workers ran at the same time, so their stages overlap
+	if stats is not None:
+		for piece, piece_stats in pieces:
+			stats.merge(piece_stats)
+	pieces = [piece for piece, piece_stats in pieces]
+
+	#stitch them back together
+	channels = {}
+	for name in pieces[0]:
+		parts = [piece[name] for piece in pieces if len(piece[name])]
+		if len(parts) > 1:
+			channels[name] = pd.concat(parts)
+		elif len(parts) == 1:
+			channels[name] = parts[0]
+		else:
+			channels[name] = pieces[0][name]
+
+	return channels
+
+#cut the bytes from start to end of a log into at most parts ranges that start and end on a line boundary
+def split_log(filename, parts, start=0, end=None):
+	#compressed logs can only be split where a block starts
+	if logfile.is_compressed(filename):
+		return split_blocks(filename, parts, start, end)
+
+	if end is None:
+		end = os.path.getsize(filename)
+
+	size = end - start
+	parts = min(parts, size // MIN_CHUNK_SIZE)
+	if parts < 2:
+		return [(start, end)]
+
+	ranges = []
+	first = start
+	with open(filename, 'rb') as fp:
+		with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			for i in range(1, parts):
+				newline = mm.find(b'\n', max(start, first + size * i // parts), end)
+				if newline == -1:
+					break
+
+				ranges.append((start, newline + 1))
+				start = newline + 1
+
+	if start < end:
+		ranges.append((start, end))
+
+	return ranges
+
+#split_log() for a compressed log, using the blocks from logfile.BlockWriter.  plain gzip or xz logs can't be split.
+def split_blocks(filename, parts, start=0, end=None):
+	blocks = logfile.load_blocks(filename)
+	if not blocks:
+		return [(start, end)]
+
+	cuts = [uncompressed for compressed, uncompressed in blocks if uncompressed > start and (end is None or uncompressed < end)]
+	if not len(cuts):
+		return [(start, end)]
+
+	#we don't know how big the last block is, so guess
+	size = (cuts[-1] if end is None else end) - start
+	parts = min(parts, size // MIN_CHUNK_SIZE, len(cuts) + 1)
+	if parts < 2:
+		return [(start, end)]
+
+	edges = [start] + sorted(set(cuts[len(cuts) * i // parts] for i in range(1, parts))) + [end]
+
+	return list(zip(edges[0:-1], edges[1:]))
+
+#decode_range() in a worker process, our stats have to come back with the channels
+def decode_piece(filename, use_sog, start, end, window):
+	stats = LogStats()
+	channels = decode_range(filename, use_sog, start, end, window, stats)
+
+	return channels, stats
+
+#decode the lines between byte offsets start and end of a log file, the whole thing by default.
+#with a window we skip any lines outside of it.
+def decode_range(filename, use_sog=False, start=0, end=None, window=None, stats=None):
+	if stats is None:
+		stats = LogStats()
+
+	#our arrays
+	twa_data = []
+	tws_data = []
+	bsp_data = []
+	
+	twa_time = []
+	tws_time = []
+	bsp_time = []
+
+	#raw nmea lines and the timestamp info for each one, decoded all at once at the end
+	nmea_lines = []
+	nmea_unix = []
+	nmea_zones = []
+	nmea_text = []
+
+	#we only need wind and one kind of boat speed, skip all the other chatter
+	if use_sog:
+		bsp_channel = 'sog'
+	else:
+		bsp_channel = 'water_speed'
+
+	#where our signal k values and their timestamps go
+	signalk_data = {'twa': twa_data, 'tws': tws_data, bsp_channel: bsp_data}
+	signalk_time = {'twa': twa_time, 'tws': tws_time, bsp_channel: bsp_time}
+
+	#how many lines did we look at, and how many were garbage?
+	line_count = 0
+	json_failures = 0
+	signalk_values = 0
+
+	#read lines until the end of our range.
+	stats.start('read')
+	for json_line in logfile.read_lines(filename, start, end):
+		if window is not None and not in_window(line_time(json_line), window):
+			continue
+
+		line_count += 1
+		
+		try:
+			data = json.loads(json_line)
+		except ValueError:
+			json_failures += 1
+			continue
+		
+		#What about NMEA0183 logs?
+		if 'lines' in data and data['lines'] is not None:
+			#only use ones that have the unix time now.
+			if 'unix_time' in data:
+				unix_time = data['unix_time']
+				zone = data['timezone']
+			else:
+				unix_time = math.nan
+				zone = None
+
+			for line in data['lines']:
+				nmea_lines.append(line)
+				nmea_unix.append(unix_time)
+				nmea_zones.append(zone)
+				nmea_text.append(data.get('time'))
+		#what about Signal K?
+		elif 'updates' in data and data['updates'] is not None:
+			#deltas can be batched, so look at every value in every update
+			for update in data['updates']:
+				timestamp = update.get('timestamp')
+				if timestamp is None:
+					continue
+
+				for value in update.get('values') or []:
+					signalk_values += 1
+					channel, convert = signalk_paths.get(value.get('path'), (None, None))
+					if channel not in signalk_data:
+						continue
+
+					try:
+						signalk_data[channel].append(convert(float(value['value'])))
+						signalk_time[channel].append(timestamp)
+					except (KeyError, TypeError, ValueError):
+						continue
+
+		else:
+			print ("Empty lines...")
+
+	stats.stop('read')
+	stats.count('lines', line_count)
+	stats.count('json_failures', json_failures)
+	stats.count('signalk_values', signalk_values)
+
+	stats.start('parse')
+	twa_time = signalk_index(twa_time)
+	tws_time = signalk_index(tws_time)
+	bsp_time = signalk_index(bsp_time)
+
+	#run all our nmea through the parser in one go, straight to arrays
+	if len(nmea_lines):
+		values, index = nmea0183.decode_columns(nmea_lines, ('twa', 'tws', bsp_channel), stats.counts)
+		del nmea_lines
+
+		nmea_unix = np.array(nmea_unix, dtype='float64')
+		nmea_zones = np.array(nmea_zones, dtype='object')
+		nmea_text = np.array(nmea_text, dtype='object')
+
+		twa_time = add_times(twa_time, nmea_index(index['twa'], nmea_unix, nmea_zones, nmea_text))
+		twa_data = np.concatenate((twa_data, values['twa']))
+		tws_time = add_times(tws_time, nmea_index(index['tws'], nmea_unix, nmea_zones, nmea_text))
+		tws_data = np.concatenate((tws_data, values['tws']))
+		bsp_time = add_times(bsp_time, nmea_index(index[bsp_channel], nmea_unix, nmea_zones, nmea_text))
+		bsp_data = np.concatenate((bsp_data, values[bsp_channel]))
+
+	#make our data series
+	channels = {}
+	channels['twa'] = pd.Series(data=twa_data, index=pd.Index(twa_time), dtype='float')
+	channels['tws'] = pd.Series(data=tws_data, index=pd.Index(tws_time), dtype='float')
+	channels['bsp'] = pd.Series(data=bsp_data, index=pd.Index(bsp_time), dtype='float')
+	stats.stop('parse')
+
+	return channels
+
+#split a channel into pieces wherever there's more than max_gap seconds between samples, eg. from logger restarts
+def split_gaps(series, max_gap):
+	if len(series) < 2:
+		return [series]
+
+	index = series.index
+	gaps = np.flatnonzero(index[1:] - index[:-1] > pd.Timedelta(seconds=max_gap))
+	bounds = [0] + (gaps + 1).tolist() + [len(series)]
+
+	return [series.iloc[start:end] for start, end in zip(bounds[0:-1], bounds[1:])]
+
+#line up resampled channels on the times of base, all at once.  returns a float64 array per channel, base first.
+#the others are NaN wherever they have no value at that time.
+def align(base, *others):
+	aligned = [base.to_numpy(dtype='float64')]
+	for other in others:
+		aligned.append(other.reindex(base.index).to_numpy(dtype='float64'))
+
+	return aligned
+
+#parse a timestamp from a log or the command line.  we keep everything naive, anything with a timezone gets converted to UTC.
+def parse_time(text):
+	try:
+		mytime = datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+	except ValueError:
+		return None
+
+	if mytime.tzinfo is not None:
+		mytime = mytime.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+	return mytime
+
+#the human readable time of a json log line, without decoding all of it.
+#that's the local 'time' for our nmea logs, or the first update 'timestamp' in UTC for signal k.  None if it doesn't have one.
+def line_time(json_line):
+	for key in (b'"time": "', b'"timestamp": "'):
+		pos = json_line.find(key)
+		if pos != -1:
+			pos += len(key)
+			return parse_time(json_line[pos:json_line.find(b'"', pos)].decode('ascii', 'replace'))
+
+	return None
+
+#is a line time inside our (start, end) window?  both ends are inclusive.
+def in_window(mytime, window):
+	if mytime is None:
+		return False
+	if window[0] is not None and mytime < window[0]:
+		return False
+	if window[1] is not None and mytime > window[1]:
+		return False
+
+	return True
+
+#the seek index lives right next to the log file
+def index_path(filename):
+	return filename + '.idx'
+
+#scan a whole log and note the byte offset of the first line of every INDEX_INTERVAL seconds.
+#returns a list of (seconds, offset) sorted by time, assuming the log was written in order.
+def build_index(filename):
+	entries = []
+	offset = 0
+	next_time = None
+	for json_line in logfile.read_lines(filename):
+		mytime = line_time(json_line)
+		if mytime is not None:
+			seconds = (mytime - datetime.datetime(1970, 1, 1)).total_seconds()
+			if next_time is None or seconds >= next_time:
+				entries.append((seconds, offset))
+				next_time = seconds + INDEX_INTERVAL
+
+		offset += len(json_line)
+
+	return entries
+
+#load the seek index for a log, building and saving it first if it is missing or stale
+def load_index(filename):
+	path = index_path(filename)
+	signature = file_signature(filename)
+
+	try:
+		with open(path) as fp:
+			index = json.load(fp)
+		if index.get('version') == INDEX_VERSION and index.get('size') == signature['size'] and index.get('mtime_ns') == signature['mtime_ns']:
+			return [tuple(entry) for entry in index['entries']]
+	except (OSError, ValueError):
+		pass
+
+	entries = build_index(filename)
+
+	index = {}
+	index['version'] = INDEX_VERSION
+	index['size'] = signature['size']
+	index['mtime_ns'] = signature['mtime_ns']
+	index['interval'] = INDEX_INTERVAL
+	index['entries'] = entries
+
+	try:
+		with open(path, 'w') as fp:
+			json.dump(index, fp)
+	except OSError as e:
+		print("Could not write seek index {}: {}".format(path, e))
+
+	return entries
+
+#byte range of a log that holds everything in our window, give or take INDEX_INTERVAL seconds on each end
+def seek_window(filename, window):
+	entries = load_index(filename)
+	times = [entry[0] for entry in entries]
+
+	#start from the last indexed line at or before our start time
+	start = 0
+	if window[0] is not None:
+		i = bisect.bisect_right(times, (window[0] - datetime.datetime(1970, 1, 1)).total_seconds())
+		if i > 0:
+			start = entries[i - 1][1]
+
+	#and stop at the first indexed line after our end time
+	end = None
+	if window[1] is not None:
+		i = bisect.bisect_right(times, (window[1] - datetime.datetime(1970, 1, 1)).total_seconds())
+		if i < len(entries):
+			end = entries[i][1]
+
+	return start, end
+
+#where we keep the decoded channels for one log file.  boat speed can come from two places, so that's part of the key too.
+def cache_path(cache_dir, filename, use_sog=False):
+	key = "{}|{}".format(os.path.abspath(filename), 'sog' if use_sog else 'water_speed')
+	digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16]
+	return os.path.join(cache_dir, "{}-{}".format(os.path.basename(filename), digest))
+
+#size and modification time of a log file, if either one changes our cache is stale
+def file_signature(filename):
+	stat = os.stat(filename)
+	return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+#name of the timezone on a datetime index so we can rebuild it later.  None if it's naive, False if we don't know how to save it.
+def index_timezone(index):
+	if index.tz is None:
+		return None
+
+	#zones from tz.gettz() remember the zoneinfo file they came from
+	name = getattr(index.tz, '_filename', None) or str(index.tz)
+	if name != 'UTC' and tz.gettz(name) is None:
+		return False
+
+	return name
+
+#turn saved nanoseconds back into the same index we started with
+def make_index(times, timezone):
+	if not len(times):
+		return pd.Index([])
+
+	if timezone is None:
+		return pd.DatetimeIndex(times)
+	elif timezone == 'UTC':
+		return pd.DatetimeIndex(times).tz_localize('UTC')
+	else:
+		return pd.DatetimeIndex(times).tz_localize('UTC').tz_convert(tz.gettz(timezone))
+
+#load the cached channels if they are still good, otherwise None
+def load_cache(path, signature):
+	try:
+		with open(os.path.join(path, 'meta.json')) as fp:
+			meta = json.load(fp)
+	except (OSError, ValueError):
+		return None
+
+	if meta.get('version') != CACHE_VERSION or meta.get('size') != signature['size'] or meta.get('mtime_ns') != signature['mtime_ns']:
+		return None
+
+	try:
+		channels = {}
+		for name, timezone in meta['channels'].items():
+			times = np.load(os.path.join(path, name + '-time.npy'))
+			values = np.load(os.path.join(path, name + '-data.npy'))
+			channels[name] = pd.Series(data=values, index=make_index(times, timezone), dtype='float')
+	except (OSError, ValueError):
+		return None
+
+	return channels
+
+#write decoded channels to the cache, one array of times and one of values per channel.
+#meta.json goes last, so a half written cache never looks valid.
+def save_cache(path, signature, channels):
+	meta = {}
+	meta['version'] = CACHE_VERSION
+	meta['size'] = signature['size']
+	meta['mtime_ns'] = signature['mtime_ns']
+	meta['channels'] = {}
+
+	for name, series in channels.items():
+		if len(series) and not isinstance(series.index, pd.DatetimeIndex):
+			return
+		if len(series):
+			timezone = index_timezone(series.index)
+			if timezone is False:
+				return
+			meta['channels'][name] = timezone
+		else:
+			meta['channels'][name] = None
+
+	if not os.path.exists(path):
+		os.makedirs(path)
+
+	metafile = os.path.join(path, 'meta.json')
+	if os.path.exists(metafile):
+		os.remove(metafile)
+
+	for name, series in channels.items():
+		if len(series):
+			times = ns_times(series.index)
+		else:
+			times = np.array([], dtype='int64')
+		np.save(os.path.join(path, name + '-time.npy'), times)
+		np.save(os.path.join(path, name + '-data.npy'), np.asarray(series.values, dtype='float64'))
+
+	with open(metafile, 'w') as fp:
+		json.dump(meta, fp)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Stream Filter
+Butterworth low pass filters that work through data a chunk at a time, so memory depends on the chunk size instead of the length of the log.
+"""
+
+__author__ = "Zach Hoeken"
+__copyright__ = "Copyright 2022, Zach Hoeken"
+__credits__ = ["Zach Hoeken"]
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Zach Hoeken"
+__email__ = "hoeken@gmail.com"
+__status__ = "Beta"
+
+import numpy as np
+
+from scipy import signal
+
+#how many samples to settle the forward-backward filter on either side of a chunk, as a multiple of 1/hz
+OVERLAP_PERIODS = 20
+
+#our low pass filter as second order sections, they are much better behaved than b/a when run in pieces
+def butter_sos(hz, order=3):
+	return signal.butter(order, hz, analog=False, output='sos')
+
+#split an array into chunks of size samples, without copying it
+def chunks_of(data, size):
+	for start in range(0, len(data), size):
+		yield data[start:start+size]
+
+#a causal Butterworth filter that carries its state from one chunk to the next.
+#the output lags the input a little, but it only ever needs one chunk in memory.
+class StreamingButter:
+
+	def __init__(self, hz, order=3):
+		self.sos = butter_sos(hz, order)
+		self.zi = None
+
+	def filter(self, chunk):
+		chunk = np.asarray(chunk, dtype='float64')
+		if not len(chunk):
+			return chunk
+
+		#start off settled at our first value, like we've been sitting there forever
+		if self.zi is None:
+			self.zi = signal.sosfilt_zi(self.sos) * chunk[0]
+
+		output, self.zi = signal.sosfilt(self.sos, chunk, zi=self.zi)
+
+		return output
+
+#run a whole iterable of chunks through a StreamingButter, yields the filtered chunks
+def causal_filter(chunks, hz, order=3):
+	butter = StreamingButter(hz, order)
+	for chunk in chunks:
+		yield butter.filter(chunk)
+
+#a zero phase forward-backward Butterworth filter (like filtfilt) over an iterable of chunks.
+#each chunk is filtered along with overlap samples on either side so the filter can settle, then those get thrown away.
+#memory depends on the chunk size plus the overlap.  output comes out overlap samples behind the input, and the same length overall.
+def chunked_filtfilt(chunks, hz, order=3, overlap=None):
+	sos = butter_sos(hz, order)
+	if overlap is None:
+		overlap = int(OVERLAP_PERIODS / hz)
+	overlap = max(overlap, 0)
+
+	#samples we have already sent out, kept for context, and ones we haven't yet
+	history = np.empty(0)
+	pending = np.empty(0)
+
+	for chunk in chunks:
+		pending = np.concatenate((pending, np.asarray(chunk, dtype='float64')))
+
+		#we need overlap samples after the ones we send out
+		ready = len(pending) - overlap
+		if ready > 0:
+			yield filter_window(sos, history, pending)[0:ready]
+
+			#careful, [-0:] would keep all of it
+			if overlap:
+				history = np.concatenate((history, pending[0:ready]))[-overlap:]
+			pending = pending[ready:]
+
+	#and whatever is left at the end
+	if len(pending):
+		yield filter_window(sos, history, pending)
+
+#forward-backward filter history + pending, returns just the pending part
+def filter_window(sos, history, pending):
+	window = np.concatenate((history, pending))
+
+	#same padding sosfiltfilt() would use on the whole thing, but short bits of data can't have as much
+	padlen = 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum()))
+	padlen = min(padlen, len(window) - 1)
+	filtered = signal.sosfiltfilt(sos, window, padtype='constant', padlen=padlen)
+
+	return filtered[len(history):]
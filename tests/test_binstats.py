@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import binstats
+
+CELLS = 5
+
+def samples(count, seed):
+	rnd = np.random.default_rng(seed)
+	cells = rnd.integers(0, CELLS - 1, count)
+	values = rnd.normal(6, 1.5, count).clip(0, 20)
+
+	return cells, values
+
+#what numpy gets for each cell, working on all the data at once
+def direct(cells, values, func):
+	return np.array([func(values[cells == cell]) if (cells == cell).any() else np.nan for cell in range(CELLS)])
+
+#adding data in batches, or merging stats from separate batches, gives the same mean and std dev as numpy on everything
+@pytest.mark.parametrize('batches', [1, 3, 10])
+def test_batches_and_merge_match_numpy(batches):
+	cells, values = samples(20000, 1)
+
+	added = binstats.BinStats(CELLS)
+	merged = binstats.BinStats(CELLS)
+	for batch_cells, batch_values in zip(np.array_split(cells, batches), np.array_split(values, batches)):
+		added.add(batch_cells, batch_values)
+
+		part = binstats.BinStats(CELLS)
+		part.add(batch_cells, batch_values)
+		merged.merge(part)
+
+	mean = direct(cells, values, np.mean)
+	std = direct(cells, values, np.std)
+	for stats in (added, merged):
+		assert stats.count.tolist() == np.bincount(cells, minlength=CELLS).tolist()
+		used = stats.count > 0
+		assert np.allclose(stats.mean[used], mean[used], rtol=0, atol=1e-9)
+		assert np.allclose(stats.stddev()[used], std[used], rtol=0, atol=1e-9)
+
+	assert (added.histogram == merged.histogram).all()
+	#the last cell never gets anything
+	assert merged.count[-1] == 0 and merged.mean[-1] == 0
+
+#the median and filtered mean come from the histogram, so they're only within a bucket or so of the real thing
+def test_median_and_filtered_mean():
+	cells, values = samples(20000, 2)
+	stats = binstats.BinStats(CELLS)
+	stats.add(cells, values)
+
+	for cell in range(CELLS - 1):
+		data = values[cells == cell]
+		assert abs(stats.median(cell) - np.median(data)) < binstats.HISTOGRAM_STEP
+
+		low = data.mean() - data.std()
+		high = data.mean() + data.std()
+		expected = data[(data >= low) & (data <= high)].mean()
+		assert abs(stats.filtered_mean(cell, low, high) - expected) < binstats.HISTOGRAM_STEP
+
+#NaN doesn't count, and stats with different bins can't be merged
+def test_nan_and_mismatched_merge():
+	stats = binstats.BinStats(CELLS)
+	stats.add([0, 0, 1], [5.0, np.nan, 7.0])
+	assert stats.count.tolist()[0:2] == [1, 1]
+	assert stats.mean[0] == 5.0
+
+	with pytest.raises(ValueError):
+		stats.merge(binstats.BinStats(CELLS + 1))
@@ -0,0 +1,49 @@
+import numpy as np
+
+import boatpolar
+
+#random samples plus exact ties between bins, and values that don't belong anywhere
+def samples(count=5000, seed=1):
+	rnd = np.random.default_rng(seed)
+	twa = rnd.uniform(-10, 200, count)
+	tws = rnd.uniform(-5, 50, count)
+	bsp = rnd.uniform(0, 12, count)
+
+	#halfway between two bins
+	twa[0:500] = rnd.choice(boatpolar.BoatPolar.wind_angles, 500) + 5
+	tws[500:1000] = rnd.choice([4.5, 5.5, 9.5, 11.0, 13.0, 18.0, 22.5, 37.5], 500)
+	#right on a bin
+	twa[1000:1200] = rnd.choice(boatpolar.BoatPolar.wind_angles, 200)
+	tws[1000:1200] = rnd.choice(boatpolar.BoatPolar.wind_speeds, 200)
+	#garbage
+	twa[1200:1210] = np.nan
+	tws[1210:1220] = np.nan
+	twa[1220:1225] = np.inf
+	tws[1225:1230] = -np.inf
+	twa[1230:1240] = 5000.0
+	tws[1240:1250] = -2000.0
+
+	return twa, tws, bsp
+
+def test_nearest_bins_ties():
+	bins = [0, 4, 5, 6, 10]
+	values = [-1, 2, 4.5, 5.5, 8, 9, 100, 2000, np.nan]
+
+	assert boatpolar.nearest_bins(values, bins).tolist() == [0, 0, 1, 2, 3, 4, 4, 0, 0]
+
+#bin_all_speeds() puts every sample in the same cell, in the same order, as calling bin_speeds() one at a time
+def test_bin_all_speeds_matches_bin_speeds():
+	twa, tws, bsp = samples()
+
+	one_at_a_time = boatpolar.BoatPolar()
+	for i in range(len(bsp)):
+		one_at_a_time.bin_speeds(twa[i], tws[i], bsp[i])
+
+	all_at_once = boatpolar.BoatPolar()
+	all_at_once.bin_all_speeds(twa, tws, bsp)
+
+	expected = one_at_a_time.get_bins()
+	actual = all_at_once.get_bins()
+	for speed in boatpolar.BoatPolar.wind_speeds:
+		for angle in boatpolar.BoatPolar.wind_angles:
+			assert actual[speed][angle].tolist() == expected[speed][angle].tolist()
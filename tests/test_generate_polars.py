@@ -0,0 +1,50 @@
+import os
+import sys
+import importlib.util
+
+import matplotlib.pyplot as plt
+
+#generate-polars.py isn't a module name, so load it by path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(name, filename):
+	if name not in sys.modules:
+		spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[name] = module
+		spec.loader.exec_module(module)
+
+	return sys.modules[name]
+
+generate_polars = load_script('generate_polars', 'generate-polars.py')
+benchmark_parser = load_script('benchmark_parser', 'benchmark-parser.py')
+
+#run generate-polars.py on a directory of logs, returns the polar csv files it wrote
+def run(tmp_path, monkeypatch, name, jobs):
+	workdir = tmp_path / name
+	workdir.mkdir()
+	monkeypatch.chdir(workdir)
+	monkeypatch.setattr(sys, 'argv', ['generate-polars.py', '-d', str(tmp_path / 'logs'), '--no_cache', '-j', str(jobs)])
+	generate_polars.main()
+
+	polars = {}
+	for fname in sorted(os.listdir(workdir / 'polars')):
+		with open(workdir / 'polars' / fname) as fp:
+			polars[fname] = fp.read()
+
+	return polars
+
+#reading the logs in parallel gives exactly the same polars as one at a time
+def test_parallel_files_match_serial(tmp_path, monkeypatch):
+	#the graphs get drawn, but writing them out at 600 dpi is most of the run
+	monkeypatch.setattr(plt, 'savefig', lambda *args, **kwargs: None)
+
+	(tmp_path / 'logs').mkdir()
+	for seed in range(3):
+		benchmark_parser.write_log(str(tmp_path / 'logs' / 'log-{}.txt'.format(seed)), benchmark_parser.generate_stream(600, seed))
+
+	serial = run(tmp_path, monkeypatch, 'serial', 1)
+	parallel = run(tmp_path, monkeypatch, 'parallel', 3)
+
+	assert len(serial) == 6
+	assert parallel == serial
@@ -0,0 +1,64 @@
+import gzip
+
+import logfile
+import polarlog
+
+LINES = ["{{\"line\": {}, \"text\": \"{}\"}}\n".format(i, 'x' * (i % 50)) for i in range(2000)]
+
+def write_blocks(filename, block_size=4096):
+	with logfile.BlockWriter(filename, block_size=block_size) as writer:
+		for line in LINES:
+			writer.write(line)
+
+#any gzip reader sees one plain log, but we get an index of where each block starts
+def test_block_writer(tmp_path):
+	filename = str(tmp_path / 'log.txt.gz')
+	write_blocks(filename)
+
+	with gzip.open(filename, 'rt') as fp:
+		assert fp.read() == ''.join(LINES)
+
+	blocks = logfile.load_blocks(filename)
+	assert len(blocks) > 10
+	assert blocks[0] == (0, 0)
+
+	#every block starts on a line
+	text = ''.join(LINES).encode('utf-8')
+	for compressed, uncompressed in blocks[1:]:
+		assert text[uncompressed - 1:uncompressed] == b'\n'
+
+#reading from the middle of a compressed log jumps to the right block
+def test_read_lines_ranges(tmp_path):
+	filename = str(tmp_path / 'log.txt.gz')
+	write_blocks(filename)
+	text = ''.join(LINES).encode('utf-8')
+
+	blocks = logfile.load_blocks(filename)
+	start = blocks[5][1]
+	end = blocks[8][1]
+	assert b''.join(logfile.read_lines(filename, start, end)) == text[start:end]
+	assert b''.join(logfile.read_lines(filename)) == text
+
+#split_blocks() cuts on block boundaries, and the pieces read back as the whole log
+def test_split_blocks(tmp_path, monkeypatch):
+	filename = str(tmp_path / 'log.txt.gz')
+	write_blocks(filename)
+	monkeypatch.setattr(polarlog, 'MIN_CHUNK_SIZE', 1)
+
+	ranges = polarlog.split_log(filename, 4)
+	assert len(ranges) == 4
+	assert ranges[0][0] == 0 and ranges[-1][1] is None
+
+	pieces = [b''.join(logfile.read_lines(filename, start, end)) for start, end in ranges]
+	assert b''.join(pieces) == ''.join(LINES).encode('utf-8')
+
+#a log that's still being written can be read up to the last flush
+def test_block_writer_flush(tmp_path):
+	filename = str(tmp_path / 'log.txt.gz')
+	writer = logfile.BlockWriter(filename, block_size=1024 * 1024)
+	for line in LINES[0:100]:
+		writer.write(line)
+	writer.flush()
+
+	assert b''.join(logfile.read_lines(filename)) == ''.join(LINES[0:100]).encode('utf-8')
+	writer.close()
@@ -0,0 +1,191 @@
+import functools
+import operator
+
+import pytest
+
+import nmea0183
+
+#wrap a sentence body with $ and its checksum
+def checksum_line(body, hex_format='{:02X}'):
+	checksum = functools.reduce(operator.xor, body.encode('ascii'), 0)
+	return "${}*{}".format(body, hex_format.format(checksum))
+
+VALID = [
+	checksum_line('IIMWV,43.1,T,8.0,N,A'),
+	checksum_line('IIVHW,,T,91.2,M,5.12,N,9.48,K'),
+	checksum_line('GPRMC,000000,A,1820.0000,N,06456.0000,W,5.3,91.2,080122,14.5,W,A'),
+	checksum_line(''),
+]
+
+BAD_CHECKSUM = [line[0:-2] + '{:02X}'.format((int(line[-2:], 16) + 1) % 256) for line in VALID]
+
+TRUNCATED = [line[0:cut] for line in VALID for cut in (1, 3, 5, len(line) - 1)]
+
+#only lines whose checksum has a letter in it are actually different in lowercase
+LOWERCASE_HEX = [line[0:-2] + line[-2:].lower() for line in VALID if line[-2:] != line[-2:].lower()]
+
+BLANK = ['', ' ', '\r\n', '\t \n']
+
+MISSING_STAR = [line.replace('*', ',') for line in VALID] + [line[0:-3] for line in VALID] + [line[1:] for line in VALID]
+
+OTHER = [
+	line + '\r\n' for line in VALID
+] + [
+	'!AIVDM,1,1,,A,13aG?P0P00PD;88MD5MTDww@2<0L,0*23',
+	'$IIMWV,43.1,T,8.0,N,A*0G',
+	'$IIMWV,43.1,T,8.0,N,A*5',
+	'$*00',
+	'$*',
+]
+
+CASES = {
+	'valid': VALID,
+	'bad_checksum': BAD_CHECKSUM,
+	'truncated': TRUNCATED,
+	'lowercase_hex': LOWERCASE_HEX,
+	'blank': BLANK,
+	'missing_star': MISSING_STAR,
+	'other': OTHER,
+}
+
+#verifylines() strips each line first, so compare it to verifyline() on the stripped line
+def expected(lines):
+	nmea = nmea0183.nmea0183()
+	return [nmea.verifyline(line.strip()) for line in lines]
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_verifylines_matches_verifyline(name):
+	lines = CASES[name]
+	nmea = nmea0183.nmea0183()
+
+	assert nmea.verifylines(lines).tolist() == expected(lines)
+
+def test_verifylines_expected_results():
+	nmea = nmea0183.nmea0183()
+
+	assert all(nmea.verifylines(VALID))
+	assert not any(nmea.verifylines(BAD_CHECKSUM))
+	assert not any(nmea.verifylines(LOWERCASE_HEX))
+	assert not any(nmea.verifylines(BLANK))
+	assert not any(nmea.verifylines(MISSING_STAR))
+
+def test_verifylines_mixed_together():
+	lines = [line for name in sorted(CASES) for line in CASES[name]]
+	nmea = nmea0183.nmea0183()
+
+	assert nmea.verifylines(lines).tolist() == expected(lines)
+
+#verifyline() can't even encode these, verifylines() just rejects them
+def test_verifylines_non_ascii():
+	lines = ['$IIMWV,43.1,T,8.0,N,°A*05', checksum_line('IIMWV,43.1,T,8.0,N,A'), '$IIMWV,43.1,T,8.0,N,A*05°']
+	nmea = nmea0183.nmea0183()
+
+	with pytest.raises(UnicodeEncodeError):
+		nmea.verifyline(lines[0])
+	assert nmea.verifylines(lines).tolist() == [False, True, False]
+
+def test_verifylines_empty():
+	nmea = nmea0183.nmea0183()
+
+	assert len(nmea.verifylines([])) == 0
+
+#a garbled number inside a repeated group makes the whole sentence invalid, just like anywhere else
+GARBLED_GROUPS = [
+	checksum_line('GPGSV,3,1,12,01,4x,123,40,02,17,308,41,12,07,344,39,14,22,228,45'),
+	checksum_line('GPGSA,A,3,04,x5,,09,12,,,24,,,,,2.5,1.3,2.1'),
+	checksum_line('IILCD,1,2,3,4x,A,5,A,6,A,7,A,8,A'),
+	checksum_line('IIXDR,C,1x.5,C,AIR'),
+]
+
+@pytest.mark.parametrize('line', GARBLED_GROUPS)
+@pytest.mark.parametrize('as_dict', [False, True])
+def test_garbled_groups_are_invalid(line, as_dict):
+	nmea = nmea0183.nmea0183(as_dict=as_dict)
+	output = nmea.parseline(line)
+
+	assert not nmea.valid
+	assert not output
+
+def test_groups_still_decode():
+	nmea = nmea0183.nmea0183()
+	output = nmea.parseline(checksum_line('GPGSV,3,1,12,01,40,123,40,02,17,308,'))
+
+	assert nmea.valid
+	assert list(output.satellites) == [nmea0183.GSVSatellite(1, 40, 123, 40), nmea0183.GSVSatellite(2, 17, 308, None)]
+
+#checksum is fine, but there's no fix so there's nothing to parse
+def test_checksum_valid_but_unparseable():
+	nmea = nmea0183.nmea0183()
+	output = nmea.parseline(checksum_line('GPRMC,,V,,,,,,,,,,N'))
+
+	assert output is None
+	assert not nmea.valid
+	assert nmea.sentence is None
+
+#parsebytes() takes any buffer, with or without line endings, and keeps the decoded sentence for logging
+@pytest.mark.parametrize('wrap', [bytes, bytearray, memoryview])
+@pytest.mark.parametrize('ending', ['', '\r\n', ' \n'])
+def test_parsebytes_buffers(wrap, ending):
+	line = VALID[0]
+	nmea = nmea0183.nmea0183()
+	output = nmea.parsebytes(wrap((line + ending).encode('ascii')))
+
+	assert nmea.valid
+	assert nmea.line == line
+	assert output == nmea0183.nmea0183().parseline(line)
+
+#subclasses can override a parser or add one for a new sentence, just by defining parse_XXX
+def test_subclass_parsers():
+	class MyParser(nmea0183.nmea0183):
+		def parse_MWV(self, params):
+			return 'my mwv'
+
+		def parse_ZZZ(self, params):
+			return params[1]
+
+	nmea = MyParser()
+	assert nmea.parseline(VALID[0]) == 'my mwv'
+	assert nmea.parseline(checksum_line('IIZZZ,hello')) == 'hello'
+	assert nmea.parseline(VALID[1]).water_speed == 5.12
+
+	#the base class is left alone
+	assert nmea0183.nmea0183().parseline(VALID[0]).twa == 43.1
+	assert nmea0183.nmea0183().parseline(checksum_line('IIZZZ,hello')) is None
+
+#split a stream into chunks of size bytes
+def chunked(data, size):
+	return [data[i:i+size] for i in range(0, len(data), size)]
+
+STREAM_LINES = [line.encode('ascii') for line in VALID[0:3]]
+
+#however the stream gets chopped up, the same sentences come out
+@pytest.mark.parametrize('size', [1, 2, 7, 1024])
+@pytest.mark.parametrize('ending', [b'\r\n', b'\n', b'\r'])
+def test_stream_reader_chunks(size, ending):
+	reader = nmea0183.NMEAStreamReader()
+	sentences = []
+	for chunk in chunked(ending.join(STREAM_LINES) + ending, size):
+		sentences.extend(reader.feed(chunk))
+
+	assert sentences == STREAM_LINES
+	assert reader.flush() == []
+
+#some talkers don't bother with line endings at all, the next $ ends the sentence
+def test_stream_reader_no_line_endings():
+	reader = nmea0183.NMEAStreamReader()
+	sentences = []
+	for chunk in chunked(b''.join(STREAM_LINES), 5):
+		sentences.extend(reader.feed(chunk))
+
+	assert sentences == STREAM_LINES[0:-1]
+	assert reader.flush() == STREAM_LINES[-1:]
+
+#junk between sentences gets dropped, and a partial line that never ends doesn't grow forever
+def test_stream_reader_garbage():
+	reader = nmea0183.NMEAStreamReader(max_length=100)
+	data = b'\x00\xffjunk' + STREAM_LINES[0] + b'\r\n\r\nmore junk\r\n' + STREAM_LINES[1] + b'\r\n'
+
+	assert reader.feed(data) == STREAM_LINES[0:2]
+	assert reader.feed(b'$' + b'x' * 200) == []
+	assert reader.buffer == b''
+	assert reader.feed(STREAM_LINES[2] + b'\n') == STREAM_LINES[2:3]
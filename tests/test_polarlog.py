@@ -0,0 +1,152 @@
+import os
+import json
+import datetime
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import logfile
+import polarlog
+
+#2022-03-13 and 2022-11-06 02:00, when the US changed clocks.  the logger labels UTC wall clock times with the
+#local timezone, so these are the unix times whose wall clock hits the skipped and repeated hours.
+DST_CHANGES = [1647136800, 1667700000]
+
+def test_unix_index_matches_nmea_time_across_dst():
+	for change in DST_CHANGES:
+		unix_times = np.arange(change - 7200, change + 7200, 0.5)
+		index = polarlog.unix_index(unix_times, 'America/New_York')
+		expected = pd.DatetimeIndex([polarlog.nmea_time((t, 'America/New_York')) for t in unix_times])
+
+		assert (index == expected).all()
+
+def nmea_line(body):
+	checksum = 0
+	for char in body:
+		checksum ^= ord(char)
+
+	return "${}*{:02X}".format(body, checksum)
+
+def write_lines(filename, lines):
+	with open(filename, 'w') as fp:
+		for line in lines:
+			fp.write(line + "\n")
+
+def signalk_log(filename):
+	lines = []
+	for i in range(60):
+		update = {'timestamp': "2022-06-01T12:00:{:02d}.{}Z".format(i, '250' if i % 2 else '000'), 'values': [
+			{'path': 'environment.wind.angleTrueWater', 'value': 0.8},
+			{'path': 'environment.wind.speedTrue', 'value': 6.0},
+			{'path': 'navigation.speedThroughWater', 'value': 3.0},
+		]}
+		lines.append(json.dumps({'updates': [update]}))
+
+	write_lines(filename, lines)
+
+#older nmea logs with only the human readable time, which isoformat() writes without the fraction when it's zero
+def text_time_log(filename):
+	lines = []
+	for i in range(60):
+		when = datetime.datetime(2022, 6, 1, 12, 0, i, 500000 if i % 2 else 0)
+		nmea = [nmea_line('IIMWV,45.0,T,12.0,N,A'), nmea_line('IIVHW,,T,180.0,M,6.00,N,11.11,K')]
+		lines.append(json.dumps({'time': when.isoformat(), 'lines': nmea}))
+
+	write_lines(filename, lines)
+
+@pytest.mark.parametrize('make_log', [signalk_log, text_time_log])
+def test_cache_round_trip(tmp_path, make_log):
+	filename = str(tmp_path / 'log.txt')
+	make_log(filename)
+	cache_dir = str(tmp_path / 'cache')
+
+	fresh = polarlog.read_log(filename, cache_dir=cache_dir)
+	stats = polarlog.LogStats()
+	cached = polarlog.read_log(filename, cache_dir=cache_dir, stats=stats)
+
+	assert stats.counts['cache_hits'] == 1
+	for name in ('twa', 'tws', 'bsp'):
+		assert len(fresh[name]) == 60
+		assert (cached[name].index == fresh[name].index).all()
+		assert cached[name].index.min().year == 2022
+		assert (cached[name].values == fresh[name].values).all()
+
+@pytest.mark.parametrize('unit', ['ns', 'us'])
+def test_split_gaps_any_time_unit(unit):
+	times = pd.DatetimeIndex(['2022-06-01 12:00:00', '2022-06-01 12:00:01', '2022-06-01 14:00:01', '2022-06-01 14:00:02'])
+	if hasattr(times, 'as_unit'):
+		times = times.as_unit(unit)
+	series = pd.Series(data=[1.0, 2.0, 3.0, 4.0], index=times)
+
+	pieces = polarlog.split_gaps(series, 60)
+
+	assert [len(piece) for piece in pieces] == [2, 2]
+
+#two workers running the same stage at overlapping times
+def test_stats_merge_reports_wall_time():
+	first = polarlog.LogStats()
+	first.add_stage('parse', [(100.0, 104.0)], 4.0, None)
+	second = polarlog.LogStats()
+	second.add_stage('parse', [(101.0, 105.0)], 4.0, None)
+	second.add_stage('parse', [(110.0, 111.0)], 1.0, None)
+
+	total = polarlog.LogStats()
+	total.merge(first)
+	total.merge(second)
+	parse = total.to_dict()['stages']['parse']
+
+	assert parse['seconds'] == 6.0
+	assert parse['worker_seconds'] == 9.0
+
+#three hours of text-time nmea, a line every 10 seconds
+def long_log(filename, hours=3):
+	lines = []
+	for i in range(hours * 360):
+		when = datetime.datetime(2022, 6, 1, 12, 0, 0) + datetime.timedelta(seconds=i * 10)
+		lines.append(json.dumps({'time': when.isoformat(), 'lines': [nmea_line('IIMWV,{:.1f},T,12.0,N,A'.format(i % 180))]}))
+
+	write_lines(filename, lines)
+
+WINDOW = (datetime.datetime(2022, 6, 1, 13, 0, 0), datetime.datetime(2022, 6, 1, 13, 30, 0))
+
+#the seek index gets us a byte range with the whole window in it, and not much else
+def test_seek_window(tmp_path):
+	filename = str(tmp_path / 'log.txt')
+	long_log(filename)
+
+	start, end = polarlog.seek_window(filename, WINDOW)
+	assert os.path.exists(polarlog.index_path(filename))
+
+	offset = 0
+	for line in logfile.read_lines(filename):
+		if polarlog.in_window(polarlog.line_time(line), WINDOW):
+			assert start <= offset and offset + len(line) <= end
+		offset += len(line)
+
+	assert end - start < offset / 4
+
+#reading a window gives the same samples as reading everything and picking out the window
+def test_read_log_window(tmp_path):
+	filename = str(tmp_path / 'log.txt')
+	long_log(filename)
+
+	everything = polarlog.read_log(filename)['twa']
+	windowed = polarlog.read_log(filename, window=WINDOW)['twa']
+
+	expected = everything[(everything.index >= WINDOW[0]) & (everything.index <= WINDOW[1])]
+	assert len(windowed) == 181
+	assert (windowed.index == expected.index).all()
+	assert (windowed.values == expected.values).all()
+
+#a log that has grown since we indexed it gets indexed again
+def test_stale_index(tmp_path):
+	filename = str(tmp_path / 'log.txt')
+	long_log(filename, 1)
+	polarlog.seek_window(filename, WINDOW)
+	long_log(filename, 3)
+
+	entries = polarlog.load_index(filename)
+	last = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=entries[-1][0])
+	assert last >= datetime.datetime(2022, 6, 1, 14, 59, 0)
+	assert polarlog.read_log(filename, window=WINDOW)['twa'].index[0] == WINDOW[0]
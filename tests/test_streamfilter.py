@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from scipy import signal
+
+import streamfilter
+
+#a wandering signal with some noise on it, like boat speed
+def noisy(count=5000, seed=1):
+	rnd = np.random.default_rng(seed)
+	return np.cumsum(rnd.normal(0, 1, count)) + rnd.normal(0, 3, count)
+
+#whatever size the chunks are, we get what filtfilt() gets on the whole thing, like generate-polars.py without --filter_chunk
+@pytest.mark.parametrize('hz', [0.1, 0.25])
+@pytest.mark.parametrize('size', [5000, 1000, 333, 50, 7])
+def test_chunked_filtfilt_matches_filtfilt(hz, size):
+	data = noisy()
+	expected = signal.filtfilt(*signal.butter(3, hz, analog=False), data, padtype='constant')
+
+	filtered = np.concatenate(list(streamfilter.chunked_filtfilt(streamfilter.chunks_of(data, size), hz)))
+
+	assert len(filtered) == len(data)
+	assert np.allclose(filtered, expected, rtol=0, atol=1e-9)
+
+#with no overlap each chunk is filtered on its own, but everything still comes out
+def test_chunked_filtfilt_no_overlap():
+	data = noisy()
+	filtered = list(streamfilter.chunked_filtfilt(streamfilter.chunks_of(data, 100), 0.1, overlap=0))
+
+	assert [len(chunk) for chunk in filtered] == [100] * 50
+
+#the causal filter carries its state across chunks, so chunking doesn't change anything
+def test_causal_filter_chunks():
+	data = noisy()
+	sos = streamfilter.butter_sos(0.1)
+	expected, zi = signal.sosfilt(sos, data, zi=signal.sosfilt_zi(sos) * data[0])
+
+	filtered = np.concatenate(list(streamfilter.causal_filter(streamfilter.chunks_of(data, 37), 0.1)))
+
+	assert np.allclose(filtered, expected, rtol=0, atol=1e-9)